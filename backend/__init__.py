@@ -1 +1,5 @@
 # backend package
+import time
+
+# the app's lifespan reports import and startup time from this point
+IMPORT_STARTED = time.perf_counter()
@@ -0,0 +1,50 @@
+# -------------------------------
+# REDIS
+# -------------------------------
+def connect_redis(url: str, setting: str):
+    """An asyncio redis client for url; setting names the variable that asked for it."""
+    try:
+        import redis.asyncio as redis
+    except ImportError as e:
+        raise RuntimeError(f"{setting}=redis needs the 'redis' package") from e
+
+    return redis.from_url(url)
+
+
+async def close_redis(client):
+    # aclose() arrived in redis 5; close() is the 4.x spelling
+    close = getattr(client, "aclose", None) or client.close
+    await close()
+
+
+# -------------------------------
+# BACKEND SLOT
+# -------------------------------
+class BackendSlot:
+    """
+    The one backend a module uses, created on first use from a setting.
+
+    choices maps the setting's values to backend classes; set() swaps in
+    any object with the same methods (tests, other stores).
+    """
+
+    def __init__(self, setting: str, value: str, choices: dict):
+        self.setting = setting
+        self.value = value
+        self.choices = choices
+        self._backend = None
+
+    def get(self):
+        if self._backend is None:
+            if self.value not in self.choices:
+                raise RuntimeError(f"Unknown {self.setting}: {self.value}")
+            self._backend = self.choices[self.value]()
+        return self._backend
+
+    def set(self, backend):
+        self._backend = backend
+
+    async def close(self):
+        if self._backend is not None:
+            await self._backend.close()
+            self._backend = None
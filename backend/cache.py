@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# -------------------------------
+# CACHE CONFIG
+# -------------------------------
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))      # seconds
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))   # capped by the token's own exp
+COUNT_CACHE_SIZE = int(os.getenv("COUNT_CACHE_SIZE", "1000"))
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", "10"))
+
+
+class TTLCache:
+    """
+    Bounded in-process cache with per-entry expiry and LRU eviction.
+
+    Entries live in this worker only; with several workers an invalidation
+    reaches the other workers when their copy expires.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._data)
+
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# authenticated user rows, keyed by user id
+user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+# decoded JWT payloads, keyed by sha256 of the token
+token_cache = TTLCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+
+# list totals, keyed by the filters they were counted with
+count_cache = TTLCache(COUNT_CACHE_SIZE, COUNT_CACHE_TTL)
+
+
+def cache_stats():
+    return {
+        "user": user_cache.stats(),
+        "token": token_cache.stats(),
+        "count": count_cache.stats(),
+    }
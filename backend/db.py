@@ -1,4 +1,19 @@
-import mysql.connector
+import asyncio
+import hashlib
+import itertools
+import math
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import aclosing, asynccontextmanager
+
+import anyio
+from fastapi import HTTPException, Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from . import sticky
+from .metrics import timed
 
 DB_CONFIG = {
     "host": "localhost",
@@ -8,5 +23,813 @@ DB_CONFIG = {
     "connection_timeout": 5,
 }
 
-def get_db():
-    return mysql.connector.connect(**DB_CONFIG)
+# -------------------------------
+# POOL CONFIG
+# -------------------------------
+# "async": aiomysql, handlers never block the event loop
+# "sync":  mysql.connector, every call runs on the threadpool
+# Each driver is imported on first use, so a worker only pays for its own.
+DB_MODE = os.getenv("DB_MODE", "async")
+
+POOL_NAME = "backend_pool"
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))            # sync mode allows at most 32
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))     # async mode only
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))     # seconds to wait for a free connection
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))    # async mode: drop idle connections older than this
+POOL_RESET_SESSION = os.getenv("DB_POOL_RESET_SESSION", "1") == "1"
+POOL_WARM_SIZE = int(os.getenv("DB_POOL_WARM_SIZE", str(POOL_SIZE)))   # connections opened before serving
+
+# -------------------------------
+# REPLICA CONFIG
+# -------------------------------
+# comma-separated host[:port] list; user, password and database come from DB_CONFIG
+DB_REPLICAS = [h.strip() for h in os.getenv("DB_REPLICAS", "").split(",") if h.strip()]
+DB_READ_STRATEGY = os.getenv("DB_READ_STRATEGY", "round_robin")          # round_robin | least_connections
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))   # how long a failed replica is skipped
+DB_STICKY_SECONDS = float(os.getenv("DB_STICKY_SECONDS", "5"))    # a client reads from the primary this long after a write
+STICKY_COOKIE = "db_last_write"     # ms timestamp of the client's last write; clients without cookies: backend.sticky
+
+# driver error codes that mean the server is gone, not that the query was bad
+LOST_CONNECTION_ERRNOS = {2003, 2006, 2013, 2055}
+
+Result = namedtuple("Result", ["rowcount", "lastrowid"])
+
+
+class IntegrityError(Exception):
+    """A write hit a unique/foreign key constraint, whatever the driver."""
+
+
+class PoolTimeout(HTTPException):
+    """No connection came free within POOL_TIMEOUT."""
+
+    def __init__(self):
+        super().__init__(status_code=503, detail="Database busy, try again")
+
+
+class PoolUnavailable(HTTPException):
+    """The server could not be reached to hand out a connection."""
+
+    def __init__(self):
+        super().__init__(status_code=503, detail="Database unavailable")
+
+
+class ConnectionLost(HTTPException):
+    """The server went away in the middle of a query."""
+
+    def __init__(self):
+        super().__init__(status_code=503, detail="Database unavailable")
+
+
+_stats_lock = threading.Lock()
+_stats = {
+    "acquired": 0,
+    "timeouts": 0,
+    "errors": 0,
+    "in_use": 0,
+    "wait_seconds_total": 0.0,
+    "wait_seconds_max": 0.0,
+}
+
+
+def _record_checkout(waited: float):
+    with _stats_lock:
+        _stats["acquired"] += 1
+        _stats["in_use"] += 1
+        _stats["wait_seconds_total"] += waited
+        _stats["wait_seconds_max"] = max(_stats["wait_seconds_max"], waited)
+
+
+def _record_checkin():
+    with _stats_lock:
+        _stats["in_use"] -= 1
+
+
+def _record_failure(key: str):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+# -------------------------------
+# SYNC MODE (mysql.connector)
+# -------------------------------
+class SyncConnection:
+    """A pooled mysql.connector connection whose calls run on the threadpool."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.abandoned = False      # an unbuffered result was left unread
+
+    def _fetch(self, sql, args, dictionary, many):
+        import mysql.connector
+
+        cur = self.raw.cursor(dictionary=dictionary)
+        try:
+            cur.execute(sql, args)
+            return cur.fetchall() if many else cur.fetchone()
+        except mysql.connector.InterfaceError as e:
+            raise ConnectionLost() from e
+        except mysql.connector.OperationalError as e:
+            if e.errno in LOST_CONNECTION_ERRNOS:
+                raise ConnectionLost() from e
+            raise
+        finally:
+            cur.close()
+
+    def _execute(self, sql, args, many):
+        import mysql.connector
+
+        cur = self.raw.cursor()
+        try:
+            if many:
+                cur.executemany(sql, args)
+            else:
+                cur.execute(sql, args)
+            return Result(cur.rowcount, cur.lastrowid)
+        except mysql.connector.IntegrityError as e:
+            raise IntegrityError(str(e)) from e
+        finally:
+            cur.close()
+
+    async def fetchone(self, sql, args=None, dictionary=True):
+        with timed("db_query"):
+            return await run_in_threadpool(self._fetch, sql, args, dictionary, False)
+
+    async def fetchall(self, sql, args=None, dictionary=True):
+        with timed("db_query"):
+            return await run_in_threadpool(self._fetch, sql, args, dictionary, True)
+
+    async def execute(self, sql, args=None):
+        with timed("db_query"):
+            return await run_in_threadpool(self._execute, sql, args, False)
+
+    async def stream(self, sql, args=None, batch_size=1000):
+        """Yield lists of row tuples from an unbuffered (server-side) cursor."""
+        cur = self.raw.cursor(buffered=False)
+        done = False
+        try:
+            with timed("db_query"):
+                await run_in_threadpool(cur.execute, sql, args)
+            while True:
+                with timed("db_query"):
+                    rows = await run_in_threadpool(cur.fetchmany, batch_size)
+                if not rows:
+                    break
+                yield rows
+            done = True
+        finally:
+            if done:
+                await run_in_threadpool(cur.close)
+            else:
+                # reading the rest (e.g. after a client disconnect) could mean
+                # the whole table: the pool drops the connection instead
+                self.abandoned = True
+
+    async def executemany(self, sql, seq_args):
+        with timed("db_query"):
+            return await run_in_threadpool(self._execute, sql, seq_args, True)
+
+    async def begin(self):
+        await run_in_threadpool(self.raw.start_transaction)
+
+    async def commit(self):
+        await run_in_threadpool(self.raw.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.raw.rollback)
+
+
+class SyncPool:
+    def __init__(self, config=DB_CONFIG, name=POOL_NAME):
+        self.config = config
+        self.name = name
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(POOL_SIZE)
+
+    def _open(self):
+        from mysql.connector import pooling
+
+        # mysql.connector opens all POOL_SIZE connections up front
+        self._pool = pooling.MySQLConnectionPool(
+            pool_name=self.name,
+            pool_size=POOL_SIZE,
+            pool_reset_session=POOL_RESET_SESSION,
+            autocommit=True,
+            **self.config
+        )
+
+    async def open(self):
+        await run_in_threadpool(self._open)
+
+    async def close(self):
+        await run_in_threadpool(self._pool._remove_connections)
+
+    def _checkout(self):
+        import mysql.connector
+
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=POOL_TIMEOUT):
+            _record_failure("timeouts")
+            raise PoolTimeout()
+
+        waited = time.perf_counter() - started
+
+        # the pool pings the connection and reconnects it if it went stale
+        try:
+            raw = self._pool.get_connection()
+        except mysql.connector.Error:
+            self._slots.release()
+            _record_failure("errors")
+            raise PoolUnavailable()
+
+        _record_checkout(waited)
+        return SyncConnection(raw)
+
+    def _checkin(self, conn):
+        import mysql.connector
+
+        try:
+            if conn.abandoned:
+                # the pool reconnects it on its next checkout
+                conn.raw._cnx.disconnect()
+            elif conn.raw.in_transaction:
+                conn.raw.rollback()
+        except mysql.connector.Error:
+            pass
+        finally:
+            try:
+                conn.raw.close()    # back to the pool, even when resetting the session fails
+            except mysql.connector.Error:
+                pass
+            self._slots.release()
+            _record_checkin()
+
+    async def acquire(self):
+        return await run_in_threadpool(self._checkout)
+
+    async def release(self, conn):
+        # shielded: a cancelled request (a client that left mid-export)
+        # still has to check its connection back in
+        with anyio.CancelScope(shield=True):
+            await run_in_threadpool(self._checkin, conn)
+
+
+# -------------------------------
+# ASYNC MODE (aiomysql)
+# -------------------------------
+class AsyncConnection:
+    """A pooled aiomysql connection."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.abandoned = False      # an unbuffered result was left unread
+
+    async def _fetch(self, sql, args, dictionary, many):
+        import aiomysql
+
+        with timed("db_query"):
+            try:
+                async with self.raw.cursor(aiomysql.DictCursor if dictionary else aiomysql.Cursor) as cur:
+                    await cur.execute(sql, args)
+                    return await (cur.fetchall() if many else cur.fetchone())
+            except aiomysql.InterfaceError as e:
+                raise ConnectionLost() from e
+            except aiomysql.OperationalError as e:
+                if e.args and e.args[0] in LOST_CONNECTION_ERRNOS:
+                    raise ConnectionLost() from e
+                raise
+
+    async def fetchone(self, sql, args=None, dictionary=True):
+        return await self._fetch(sql, args, dictionary, False)
+
+    async def fetchall(self, sql, args=None, dictionary=True):
+        return await self._fetch(sql, args, dictionary, True)
+
+    async def execute(self, sql, args=None):
+        import aiomysql
+
+        with timed("db_query"):
+            async with self.raw.cursor() as cur:
+                try:
+                    await cur.execute(sql, args)
+                except aiomysql.IntegrityError as e:
+                    raise IntegrityError(str(e)) from e
+                return Result(cur.rowcount, cur.lastrowid)
+
+    async def stream(self, sql, args=None, batch_size=1000):
+        """Yield lists of row tuples from an unbuffered (server-side) cursor."""
+        import aiomysql
+
+        cur = await self.raw.cursor(aiomysql.SSCursor)
+        done = False
+        try:
+            with timed("db_query"):
+                await cur.execute(sql, args)
+            while True:
+                with timed("db_query"):
+                    rows = await cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+            done = True
+        finally:
+            if done:
+                await cur.close()
+            else:
+                # SSCursor.close() reads the rest of the result, and the next
+                # query on the connection would too: the pool closes it instead
+                self.abandoned = True
+
+    async def executemany(self, sql, seq_args):
+        import aiomysql
+
+        with timed("db_query"):
+            async with self.raw.cursor() as cur:
+                try:
+                    await cur.executemany(sql, seq_args)
+                except aiomysql.IntegrityError as e:
+                    raise IntegrityError(str(e)) from e
+                return Result(cur.rowcount, cur.lastrowid)
+
+    async def begin(self):
+        await self.raw.begin()
+
+    async def commit(self):
+        await self.raw.commit()
+
+    async def rollback(self):
+        await self.raw.rollback()
+
+
+class AsyncPool:
+    def __init__(self, config=DB_CONFIG):
+        self.config = config
+        self._pool = None
+
+    async def open(self):
+        import aiomysql
+
+        # aiomysql drops connections the server closed (and ones older than
+        # POOL_RECYCLE) before handing them out
+        self._pool = await aiomysql.create_pool(
+            host=self.config["host"],
+            port=self.config.get("port", 3306),
+            user=self.config["user"],
+            password=self.config["password"],
+            db=self.config["database"],
+            connect_timeout=self.config["connection_timeout"],
+            minsize=POOL_MIN_SIZE,
+            maxsize=POOL_SIZE,
+            pool_recycle=POOL_RECYCLE,
+            autocommit=True,
+        )
+
+    async def close(self):
+        self._pool.close()
+        await self._pool.wait_closed()
+
+    async def acquire(self):
+        started = time.perf_counter()
+        try:
+            raw = await asyncio.wait_for(self._pool.acquire(), POOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            _record_failure("timeouts")
+            raise PoolTimeout()
+        except Exception:
+            _record_failure("errors")
+            raise PoolUnavailable()
+
+        _record_checkout(time.perf_counter() - started)
+        return AsyncConnection(raw)
+
+    async def release(self, conn):
+        # shielded, like SyncPool.release
+        with anyio.CancelScope(shield=True):
+            try:
+                if conn.abandoned:
+                    # the pool forgets a closed connection and opens a new one
+                    conn.raw.close()
+                # aiomysql closes connections released mid-transaction
+                elif conn.raw.get_transaction_status():
+                    await conn.raw.rollback()
+            except Exception:
+                pass
+            finally:
+                self._pool.release(conn.raw)
+                _record_checkin()
+
+
+# -------------------------------
+# REPLICAS
+# -------------------------------
+class Replica:
+    """A read replica's pool plus what routing needs: live checkouts and health."""
+
+    def __init__(self, name: str, pool):
+        self.name = name
+        self.pool = pool
+        self.opened = False
+        self._opening = asyncio.Lock()
+        self.in_use = 0
+        self.reads = 0
+        self.failures = 0
+        self.down_until = 0.0
+
+    @property
+    def up(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self):
+        self.failures += 1
+        self.down_until = time.monotonic() + DB_REPLICA_RETRY_SECONDS
+
+    async def acquire(self):
+        if not self.opened:
+            # a replica that was down at startup is opened on its first use;
+            # the requests that arrive meanwhile wait for that one open()
+            async with self._opening:
+                if not self.opened:
+                    try:
+                        await self.pool.open()
+                    except Exception as e:
+                        raise PoolUnavailable() from e
+                    self.opened = True
+
+        with timed("db_acquire"):
+            conn = await self.pool.acquire()
+        self.in_use += 1
+        self.reads += 1
+        return conn
+
+    async def release(self, conn):
+        self.in_use -= 1
+        await self.pool.release(conn)
+
+
+def _replica_config(host: str) -> dict:
+    host, _, port = host.partition(":")
+    config = dict(DB_CONFIG, host=host)
+    if port:
+        config["port"] = int(port)
+    return config
+
+
+def _make_replica(i: int, host: str) -> Replica:
+    config = _replica_config(host)
+    pool = AsyncPool(config) if DB_MODE == "async" else SyncPool(config, f"{POOL_NAME}_replica{i}")
+    return Replica(host, pool)
+
+
+_replicas = []
+_next_replica = itertools.count()
+
+
+def _read_targets():
+    """Healthy replicas in the order to try them, rotated for fairness."""
+    up = [r for r in _replicas if r.up]
+    if not up:
+        return []
+
+    start = next(_next_replica) % len(up)
+    up = up[start:] + up[:start]
+    if DB_READ_STRATEGY == "least_connections":
+        up.sort(key=lambda r: r.in_use)   # stable: ties keep the rotation
+    return up
+
+
+# -------------------------------
+# POOL LIFECYCLE
+# -------------------------------
+_pool = None
+
+
+async def init_pool():
+    """Create the connection pool for DB_MODE (and one per replica). Called once at app startup."""
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    pool = AsyncPool() if DB_MODE == "async" else SyncPool()
+    await pool.open()
+    _pool = pool
+
+    if not _replicas:
+        _replicas.extend(_make_replica(i, host) for i, host in enumerate(DB_REPLICAS))
+    for replica in _replicas:
+        # an unreachable replica must not stop the app: reads skip it for now
+        try:
+            await replica.pool.open()
+            replica.opened = True
+        except Exception:
+            replica.mark_down()
+
+    return _pool
+
+
+async def _warm(pool):
+    conns = await asyncio.gather(
+        *(pool.acquire() for _ in range(min(POOL_WARM_SIZE, POOL_SIZE))),
+        return_exceptions=True
+    )
+    # the connections that did open go back even when others failed
+    for conn in conns:
+        if not isinstance(conn, BaseException):
+            await pool.release(conn)
+    for conn in conns:
+        if isinstance(conn, BaseException):
+            raise conn
+
+
+async def warm_pool():
+    """
+    Open POOL_WARM_SIZE connections on the primary and every live replica
+    now, so the first burst of requests does not pay for the handshakes.
+    """
+    if _pool is None:
+        await init_pool()
+
+    await _warm(_pool)
+    for replica in _replicas:
+        if replica.opened:
+            try:
+                await _warm(replica.pool)
+            except PoolUnavailable:
+                replica.mark_down()
+
+
+async def close_pool():
+    """Close every connection in the pool. Called at app shutdown."""
+    global _pool
+    for replica in _replicas:
+        if replica.opened:
+            await replica.pool.close()
+    _replicas.clear()
+
+    if _pool is None:
+        return
+
+    await _pool.close()
+    _pool = None
+
+
+# -------------------------------
+# CONNECTIONS
+# -------------------------------
+async def _acquire():
+    if _pool is None:
+        await init_pool()
+
+    with timed("db_acquire"):
+        return await _pool.acquire()
+
+
+@asynccontextmanager
+async def connection():
+    """Check a connection out of the pool for the duration of the block."""
+    conn = await _acquire()
+    try:
+        yield conn
+    finally:
+        await _pool.release(conn)
+
+
+@asynccontextmanager
+async def read_connection(primary: bool = False):
+    """
+    A connection for reads held for the whole block (e.g. a stream):
+    the first replica that hands one out, else the primary.
+
+    Close a stream read from it (contextlib.aclosing) inside the block: a
+    stream left open marks its connection abandoned only when it is
+    finalized, after the connection went back to the pool.
+    """
+    for replica in ([] if primary else _read_targets()):
+        try:
+            conn = await replica.acquire()
+        except PoolTimeout:
+            continue
+        except PoolUnavailable:
+            replica.mark_down()
+            continue
+
+        try:
+            yield conn
+        finally:
+            await replica.release(conn)
+        return
+
+    async with connection() as conn:
+        yield conn
+
+
+class ReadConnection:
+    """
+    Read-only handle given out by get_read_conn.
+
+    Every query checks a connection out for just that query, so a request
+    answered from the caches never touches a pool and a write handler's
+    auth lookup is done before it takes its own connection. Reads go to a
+    replica unless the client is pinned to the primary; a replica that
+    fails is marked down and the query moves on to the next one, then to
+    the primary.
+    """
+
+    def __init__(self, primary: bool = False):
+        self.primary = primary
+
+    async def _read(self, method, sql, args, dictionary):
+        for replica in ([] if self.primary else _read_targets()):
+            try:
+                conn = await replica.acquire()
+            except PoolTimeout:
+                continue        # busy, not broken
+            except PoolUnavailable:
+                replica.mark_down()
+                continue
+
+            try:
+                return await getattr(conn, method)(sql, args, dictionary)
+            except ConnectionLost:
+                replica.mark_down()
+            finally:
+                await replica.release(conn)
+
+        async with connection() as conn:
+            return await getattr(conn, method)(sql, args, dictionary)
+
+    async def fetchone(self, sql, args=None, dictionary=True):
+        return await self._read("fetchone", sql, args, dictionary)
+
+    async def fetchall(self, sql, args=None, dictionary=True):
+        return await self._read("fetchall", sql, args, dictionary)
+
+    async def stream(self, sql, args=None, batch_size=1000):
+        async with read_connection(self.primary) as conn, aclosing(conn.stream(sql, args, batch_size)) as rows:
+            async for batch in rows:
+                yield batch
+
+
+class WriteConnection:
+    """
+    Primary handle given out by get_conn.
+
+    Like ReadConnection, every statement checks a connection out for just
+    that statement, so what a handler does between queries (bcrypt above
+    all) never holds one. begin() keeps a connection until commit() or
+    rollback().
+    """
+
+    def __init__(self):
+        self._conn = None       # held for a transaction
+
+    async def _call(self, method, *args):
+        if self._conn is not None:
+            return await getattr(self._conn, method)(*args)
+        async with connection() as conn:
+            return await getattr(conn, method)(*args)
+
+    async def fetchone(self, sql, args=None, dictionary=True):
+        return await self._call("fetchone", sql, args, dictionary)
+
+    async def fetchall(self, sql, args=None, dictionary=True):
+        return await self._call("fetchall", sql, args, dictionary)
+
+    async def execute(self, sql, args=None):
+        return await self._call("execute", sql, args)
+
+    async def executemany(self, sql, seq_args):
+        return await self._call("executemany", sql, seq_args)
+
+    async def stream(self, sql, args=None, batch_size=1000):
+        async with read_connection(primary=True) as conn, aclosing(conn.stream(sql, args, batch_size)) as rows:
+            async for batch in rows:
+                yield batch
+
+    async def begin(self):
+        self._conn = await _acquire()
+        try:
+            await self._conn.begin()
+        except BaseException:
+            await self.close()
+            raise
+
+    async def commit(self):
+        try:
+            await self._conn.commit()
+        finally:
+            await self.close()
+
+    async def rollback(self):
+        try:
+            await self._conn.rollback()
+        finally:
+            await self.close()
+
+    @asynccontextmanager
+    async def transaction(self):
+        """begin(), then commit() after the block or rollback() if it raises."""
+        await self.begin()
+        try:
+            yield self
+        except BaseException:
+            await self.rollback()
+            raise
+        await self.commit()
+
+    async def close(self):
+        """Give back a connection left in a transaction; the pool rolls it back."""
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            await _pool.release(conn)
+
+
+def _client_key(request: Request):
+    # a Bearer client sends the same Authorization header with its write
+    # and its reads, cookie jar or not
+    authorization = request.headers.get("authorization")
+    return hashlib.sha256(authorization.encode()).hexdigest() if authorization else None
+
+
+async def _pin_to_primary(request: Request, response: Response):
+    if not _replicas:
+        return
+
+    # the cookie travels with the client, so it holds on whichever worker
+    # serves the next read; the pin on its credentials covers clients that
+    # drop cookies
+    response.set_cookie(
+        STICKY_COOKIE, str(int(time.time() * 1000)),
+        max_age=math.ceil(DB_STICKY_SECONDS), httponly=True, samesite="lax"
+    )
+    key = _client_key(request)
+    if key is not None:
+        await sticky.pin(key, DB_STICKY_SECONDS)
+
+
+async def _pinned(request: Request) -> bool:
+    try:
+        written_ms = int(request.cookies.get(STICKY_COOKIE, ""))
+    except ValueError:
+        written_ms = 0
+    if time.time() * 1000 - written_ms < DB_STICKY_SECONDS * 1000:
+        return True
+
+    key = _client_key(request)
+    return key is not None and await sticky.pinned(key)
+
+
+async def get_conn(request: Request, response: Response):
+    """
+    FastAPI dependency: the primary, see WriteConnection.
+
+    A request that can write (anything but GET/HEAD) also pins its client
+    to the primary for DB_STICKY_SECONDS, so the client reads its own
+    writes rather than a lagging replica: through a cookie, and through
+    its Authorization header in the DB_STICKY_BACKEND store for clients
+    that do not keep cookies (shared by the workers with the redis
+    backend only). The window starts with the request: it has to cover
+    the write plus replica lag.
+    """
+    if request.method not in ("GET", "HEAD"):
+        await _pin_to_primary(request, response)
+
+    conn = WriteConnection()
+    try:
+        yield conn
+    finally:
+        await conn.close()
+
+
+async def get_read_conn(request: Request):
+    """FastAPI dependency for read-only handlers: replicas when configured, see ReadConnection."""
+    return ReadConnection(primary=not _replicas or await _pinned(request))
+
+
+# the primary's dependency kept its old name too: code written against
+# Depends(get_db) keeps working
+get_db = get_conn
+
+
+# -------------------------------
+# METRICS
+# -------------------------------
+def pool_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+
+    pools = 1 + len(_replicas)
+    stats["mode"] = DB_MODE
+    stats["size"] = POOL_SIZE
+    stats["saturation"] = stats["in_use"] / (POOL_SIZE * pools) if POOL_SIZE else 0.0
+    stats["wait_seconds_avg"] = (
+        stats["wait_seconds_total"] / stats["acquired"] if stats["acquired"] else 0.0
+    )
+    stats["replicas"] = len(_replicas)
+    stats["replicas_up"] = sum(1 for r in _replicas if r.up)
+    return stats
+
+
+def replica_stats():
+    return {
+        r.name: {"up": int(r.up), "in_use": r.in_use, "reads": r.reads, "failures": r.failures}
+        for r in _replicas
+    }
@@ -0,0 +1,123 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+from contextlib import aclosing
+
+from .db import read_connection
+
+logger = logging.getLogger("backend.email_index")
+
+# -------------------------------
+# EMAIL INDEX CONFIG
+# -------------------------------
+EMAIL_BLOOM_CAPACITY = int(os.getenv("EMAIL_BLOOM_CAPACITY", "1000000"))
+EMAIL_BLOOM_ERROR_RATE = float(os.getenv("EMAIL_BLOOM_ERROR_RATE", "0.01"))
+EMAIL_WARM_BATCH_SIZE = 10000
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no removal)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, item: str):
+        # double hashing over one blake2b digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._array[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class EmailIndex:
+    """
+    Answers "is this email free?" without the database where it can.
+
+    A Bloom filter of every email, warmed from mock_data at startup: a miss
+    means the email is definitely free. A hit may be a false positive or an
+    email since deleted or changed, so it is left to the caller's SELECT.
+    The unique index on mock_data.email stays the source of truth: other
+    workers' inserts are not seen here, so callers still turn
+    IntegrityError into a 400.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        self.ready = False
+        self.definitely_free = 0
+        self.unsure = 0
+
+    @staticmethod
+    def _key(email: str) -> str:
+        # the column's collation is case-insensitive
+        return email.strip().lower()
+
+    def is_free(self, email: str) -> bool:
+        """True if the email is certainly not taken; False means ask the database."""
+        key = self._key(email)
+        with self._lock:
+            if self.ready and key not in self._bloom:
+                self.definitely_free += 1
+                return True
+            self.unsure += 1
+            return False
+
+    def add(self, email: str):
+        """Record an email that exists (after an insert or an update)."""
+        # bits are never cleared: a deleted email only costs a SELECT later
+        key = self._key(email)
+        with self._lock:
+            self._bloom.add(key)
+
+    async def warm(self):
+        """Load every email in mock_data into the Bloom filter."""
+        loaded = 0
+        sql = "SELECT email FROM mock_data"
+        async with read_connection() as conn, aclosing(conn.stream(sql, batch_size=EMAIL_WARM_BATCH_SIZE)) as batches:
+            async for rows in batches:
+                with self._lock:
+                    for (email,) in rows:
+                        self._bloom.add(self._key(email))
+                loaded += len(rows)
+
+        if loaded > self.capacity:
+            logger.warning(
+                "email index holds %d emails, above EMAIL_BLOOM_CAPACITY=%d: more SELECTs will get through",
+                loaded, self.capacity
+            )
+        self.ready = True
+        return loaded
+
+    def stats(self):
+        return {
+            "ready": int(self.ready),
+            "bloom_bits": self._bloom.bits,
+            "definitely_free": self.definitely_free,
+            "unsure": self.unsure,
+        }
+
+
+email_index = EmailIndex(EMAIL_BLOOM_CAPACITY, EMAIL_BLOOM_ERROR_RATE)
+
+
+async def email_taken(conn, email: str) -> bool:
+    """Index first, then the database for the emails the index cannot rule out."""
+    if email_index.is_free(email):
+        return False
+
+    row = await conn.fetchone("SELECT id FROM mock_data WHERE email=%s", (email,), dictionary=False)
+    return row is not None
@@ -0,0 +1,232 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from .metrics import timed
+
+# -------------------------------
+# PASSWORD CONFIG
+# -------------------------------
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS
+)
+
+# -------------------------------
+# EXECUTOR CONFIG
+# -------------------------------
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))   # 0 = run on the threadpool
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "64"))              # jobs queued or running
+
+# bulk endpoints hash on the same processes, but never more than this many
+# jobs at once between them, so logins queue behind at most that many
+BULK_HASH_SLOTS = int(os.getenv("BULK_HASH_SLOTS", str(max(1, HASH_WORKERS // 2))))
+BULK_HASH_REQUESTS = int(os.getenv("BULK_HASH_REQUESTS", "2"))           # bulk requests hashing at once
+
+_executor = None
+_bulk_slots = None
+_pending = 0
+_bulk_requests = 0
+_stats = {
+    "completed": 0,
+    "rejected": 0,
+    "seconds_total": 0.0,
+    "seconds_max": 0.0,
+    "bulk_completed": 0,
+    "bulk_rejected": 0,
+    "pool_restarts": 0,
+}
+
+
+# -------------------------------
+# WORKER FUNCTIONS (run in child processes)
+# -------------------------------
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _load_backend() -> str:
+    # imports this module and bcrypt in the child
+    return pwd_context.handler().get_backend()
+
+
+# -------------------------------
+# EXECUTOR LIFECYCLE
+# -------------------------------
+def _process_pool(workers: int):
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def start_executor():
+    """Create the hashing process pool. Called once at app startup."""
+    global _executor
+    if _executor is None and HASH_WORKERS > 0:
+        _executor = _process_pool(HASH_WORKERS)
+    return _executor
+
+
+def _discard(executor):
+    # a child that died (OOM kill, segfault) breaks its whole pool for good:
+    # the next start_executor() builds a new one. The other jobs that failed
+    # with it find a replacement already in place.
+    global _executor
+    if executor is not _executor:
+        return
+    _executor = None
+    _stats["pool_restarts"] += 1
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _in_process(start, fn, *args):
+    """Run fn on the pool start() returns; if it is broken, on a new one, else 503."""
+    loop = asyncio.get_running_loop()
+    for _ in range(2):
+        executor = start()
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            _discard(executor)
+
+    raise HTTPException(
+        status_code=503,
+        detail="Server busy, try again",
+        headers={"Retry-After": "1"}
+    )
+
+
+async def warm_executor():
+    """Start every hashing process now rather than on the first logins."""
+    executor = start_executor()
+    if executor is None:
+        return
+
+    # jobs submitted back to back each get a new process while none is idle
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(executor, _load_backend) for _ in range(HASH_WORKERS)))
+
+
+def shutdown_executor():
+    global _executor, _bulk_slots
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+    _executor = _bulk_slots = None
+
+
+def _admit(jobs: int):
+    global _pending
+    if _pending + jobs > HASH_QUEUE_LIMIT:
+        _stats["rejected"] += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, try again",
+            headers={"Retry-After": "1"}
+        )
+
+    _pending += jobs
+
+
+async def _run(fn, *args):
+    global _pending
+    started = time.perf_counter()
+    try:
+        if HASH_WORKERS > 0:
+            return await _in_process(start_executor, fn, *args)
+        return await run_in_threadpool(fn, *args)
+    finally:
+        _pending -= 1
+        elapsed = time.perf_counter() - started
+        _stats["completed"] += 1
+        _stats["seconds_total"] += elapsed
+        _stats["seconds_max"] = max(_stats["seconds_max"], elapsed)
+
+
+async def _submit(fn, *args):
+    _admit(1)
+    return await _run(fn, *args)
+
+
+# -------------------------------
+# PASSWORD UTILS
+# -------------------------------
+async def get_password_hash(password: str) -> str:
+    with timed("password_hash"):
+        return await _submit(_hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    with timed("password_verify"):
+        return await _submit(_verify, plain_password, hashed_password)
+
+
+async def _bulk_hash(password: str) -> str:
+    global _pending
+    async with _bulk_slots:
+        # counted in the queue depth, but never turned away: the window
+        # already bounds it, and a 503 halfway through would waste the rest
+        _pending += 1
+        hashed = await _run(_hash, password)
+    _stats["bulk_completed"] += 1
+    return hashed
+
+
+async def get_password_hashes(passwords: list[str]) -> list[str]:
+    """
+    Hash many passwords for a bulk request.
+
+    They share the hashing processes with logins, one hash per job, with
+    at most BULK_HASH_SLOTS jobs in flight across all bulk requests, so
+    concurrent bulk requests take turns and logins keep the rest of the
+    processes. Past BULK_HASH_REQUESTS requests at once the next one gets
+    a 503.
+    """
+    global _bulk_requests, _bulk_slots
+    if not passwords:
+        return []
+
+    if _bulk_requests >= BULK_HASH_REQUESTS:
+        _stats["bulk_rejected"] += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, try again",
+            headers={"Retry-After": "5"}
+        )
+
+    if _bulk_slots is None:
+        _bulk_slots = asyncio.Semaphore(max(1, BULK_HASH_SLOTS))
+
+    _bulk_requests += 1
+    try:
+        with timed("password_hash"):
+            return await asyncio.gather(*(_bulk_hash(password) for password in passwords))
+    finally:
+        _bulk_requests -= 1
+
+
+# -------------------------------
+# METRICS
+# -------------------------------
+def hash_stats():
+    stats = dict(_stats)
+    stats["workers"] = HASH_WORKERS
+    stats["queue_limit"] = HASH_QUEUE_LIMIT
+    stats["queue_depth"] = _pending
+    stats["bulk_slots"] = BULK_HASH_SLOTS
+    stats["bulk_requests"] = _bulk_requests
+    stats["seconds_avg"] = (
+        stats["seconds_total"] / stats["completed"] if stats["completed"] else 0.0
+    )
+    return stats
@@ -1,11 +1,142 @@
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+import threading
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from backend.routes import auth_routes, user_routes
+import backend
+from backend.db import init_pool, close_pool, warm_pool
+from backend.email_index import email_index
+from backend.hashing import shutdown_executor, warm_executor
+from backend.metrics import MetricsMiddleware, lifecycle
+from backend.ratelimit import close_backend
+from backend.revocations import revocations
+from backend.responses import FastJSONResponse
+from backend.sticky import close_backend as close_sticky_backend
+from backend.routes import auth_routes, bulk_routes, metrics_routes, user_routes
+
+
+logger = logging.getLogger("backend.main")
+
+# -------------------------------
+# STARTUP CONFIG
+# -------------------------------
+STARTUP_WARM_TIMEOUT = float(os.getenv("STARTUP_WARM_TIMEOUT", "10"))   # seconds to wait for cache warm-up
+SHUTDOWN_DELAY = float(os.getenv("SHUTDOWN_DELAY", "5"))                 # seconds /readyz fails before SIGTERM stops the server
+
+
+async def _warm_email_index():
+    # until this finishes the index answers "ask the database"
+    try:
+        await email_index.warm()
+    except Exception:
+        logger.exception("email index warm-up failed; duplicate checks fall back to SELECT")
+
+
+async def _warm_revocations():
+    # until this succeeds tokens are checked against the DB
+    try:
+        await revocations.refresh()
+    except Exception:
+        logger.exception("token revocation warm-up failed; auth falls back to the DB lookup")
+
+
+def _delay_sigterm():
+    """
+    Wrap the server's SIGTERM handler: report not ready at once, keep
+    serving for SHUTDOWN_DELAY seconds so the load balancer sees /readyz
+    fail and stops sending traffic, then let the server stop. Returns the
+    handler to restore, or None when the server does not handle SIGTERM.
+
+    Needs uvicorn 0.29+, which installs its handler with signal.signal.
+    Older versions use loop.add_signal_handler: the loop's wakeup fd then
+    stops the server whatever handler is installed here.
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+    if threading.current_thread() is not threading.main_thread() or not callable(previous):
+        return None
+
+    loop = asyncio.get_running_loop()
 
-app = FastAPI()
+    def handle(signum, frame):
+        if not lifecycle["ready"]:
+            previous(signum, frame)     # a second SIGTERM stops it now
+            return
+        lifecycle["ready"] = 0
+        loop.call_soon_threadsafe(loop.call_later, SHUTDOWN_DELAY, previous, signum, frame)
+
+    signal.signal(signal.SIGTERM, handle)
+    return previous
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    The server only accepts connections once this reaches its yield, so
+    everything a first request would otherwise pay for happens here:
+    DB connections, hashing processes, the revocation list and (up to
+    STARTUP_WARM_TIMEOUT) the email index. On SIGTERM /readyz fails for
+    SHUTDOWN_DELAY seconds while requests are still served; the server
+    then drains in-flight requests before the code after yield runs.
+    """
+    started = time.perf_counter()
+    await init_pool()
+    await asyncio.gather(warm_pool(), warm_executor(), _warm_revocations())
+
+    # a large table may need longer: the index then finishes in the background
+    warm_index = asyncio.create_task(_warm_email_index())
+    await asyncio.wait([warm_index], timeout=STARTUP_WARM_TIMEOUT)
+    tasks = [warm_index, asyncio.create_task(revocations.run())]
+
+    lifecycle["startup_seconds"] = time.perf_counter() - started
+    lifecycle["ready"] = 1
+    previous_sigterm = _delay_sigterm()
+    logger.info(
+        "worker %d ready: imports %.0fms, warm-up %.0fms",
+        os.getpid(), lifecycle["import_seconds"] * 1000, lifecycle["startup_seconds"] * 1000
+    )
+
+    yield
+
+    lifecycle["ready"] = 0
+    if previous_sigterm is not None:
+        signal.signal(signal.SIGTERM, previous_sigterm)
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    # one failing step must not leave the others' resources open
+    for name, step in (
+        ("rate limit backend", close_backend),
+        ("sticky read backend", close_sticky_backend),
+        ("hashing processes", shutdown_executor),
+        ("connection pool", close_pool),
+    ):
+        try:
+            result = step()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception:
+            logger.exception("shutdown: closing the %s failed", name)
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth_routes.router)
+app.include_router(bulk_routes.router)
 app.include_router(user_routes.router)
+app.include_router(metrics_routes.router)
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "API is running"}
+
+
+lifecycle["import_seconds"] = time.perf_counter() - backend.IMPORT_STARTED
@@ -0,0 +1,170 @@
+import bisect
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("backend.metrics")
+
+# -------------------------------
+# METRICS CONFIG
+# -------------------------------
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "1.0"))   # 0 disables the slow log
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# phase -> seconds for the request being served
+_phases = contextvars.ContextVar("phases", default=None)
+
+# worker lifecycle, filled in by the app's lifespan
+lifecycle = {
+    "ready": 0,
+    "import_seconds": 0.0,
+    "startup_seconds": 0.0,
+}
+
+
+class Histogram:
+    """Minimal Prometheus histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help: str, labelnames: tuple, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # per-bucket counts (+Inf last), sum, count
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in self._series.items()]
+
+        for labels, counts, total, count in snapshot:
+            base = ",".join(f'{k}="{v}"' for k, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+
+request_seconds = Histogram(
+    "backend_request_seconds", "Request latency by route",
+    ("method", "route", "status")
+)
+phase_seconds = Histogram(
+    "backend_phase_seconds", "Time spent per request in each phase",
+    ("route", "phase")
+)
+
+
+# -------------------------------
+# PHASE TIMING
+# -------------------------------
+@contextmanager
+def timed(phase: str):
+    """Add the time spent in the block to the current request's phase totals."""
+    phases = _phases.get()
+    if phases is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and flushes its phase totals into the histograms."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases = {}
+        token = _phases.set(phases)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _phases.reset(token)
+
+            # the router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_seconds.observe((scope["method"], route, str(status)), elapsed)
+            for phase, seconds in phases.items():
+                phase_seconds.observe((route, phase), seconds)
+
+            if SLOW_REQUEST_SECONDS and elapsed >= SLOW_REQUEST_SECONDS:
+                breakdown = " ".join(f"{p}={s * 1000:.1f}ms" for p, s in sorted(phases.items()))
+                logger.warning(
+                    "slow request %s %s -> %s in %.1fms: %s",
+                    scope["method"], route, status, elapsed * 1000, breakdown or "-"
+                )
+
+
+# -------------------------------
+# EXPOSITION
+# -------------------------------
+def _gauges(prefix: str, stats: dict, labels: str = "") -> list[str]:
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"{prefix}_{key}{labels} {value}")
+    return lines
+
+
+def render_metrics() -> str:
+    from .cache import cache_stats
+    from .db import pool_stats, replica_stats
+    from .email_index import email_index
+    from .hashing import hash_stats
+    from .ratelimit import ratelimit_stats
+    from .revocations import revocations
+    from .sticky import sticky_stats
+
+    lines = request_seconds.render() + phase_seconds.render()
+    lines += _gauges("backend_lifecycle", lifecycle)
+    lines += _gauges("backend_db_pool", pool_stats())
+    for name, stats in replica_stats().items():
+        lines += _gauges("backend_db_replica", stats, f'{{replica="{name}"}}')
+    lines += _gauges("backend_hash", hash_stats())
+    for name, stats in cache_stats().items():
+        lines += _gauges("backend_cache", stats, f'{{cache="{name}"}}')
+    for name, stats in ratelimit_stats().items():
+        lines += _gauges("backend_ratelimit", stats, f'{{rule="{name}"}}')
+    lines += _gauges("backend_email_index", email_index.stats())
+    lines += _gauges("backend_revocations", revocations.stats())
+    lines += _gauges("backend_sticky", sticky_stats())
+
+    return "\n".join(lines) + "\n"
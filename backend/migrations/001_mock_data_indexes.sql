@@ -0,0 +1,25 @@
+-- Indexes for the paginated /users and /db-users listings.
+--
+-- Keyset pagination walks the primary key (WHERE id > ? ORDER BY id LIMIT ?),
+-- so it needs nothing extra. The prefix filters (email LIKE 'x%',
+-- name LIKE 'x%') use the two indexes below.
+--
+-- email is made UNIQUE: register/create_user already treat it as unique.
+-- Remove any duplicate emails before running this.
+--
+-- The ALTER also redefines name and email as VARCHAR(255) NOT NULL, whatever
+-- they were before (TEXT cannot be indexed without a prefix length). Check
+-- the data first:
+--   * a NULL name or email makes the ALTER fail (strict mode) or turns it
+--     into '' (non-strict), and several '' emails then break the UNIQUE index;
+--   * values longer than 255 characters make it fail (strict mode) or are
+--     silently truncated (non-strict), which can also create duplicates.
+--   SELECT COUNT(*) FROM mock_data
+--    WHERE name IS NULL OR email IS NULL
+--       OR CHAR_LENGTH(name) > 255 OR CHAR_LENGTH(email) > 255;
+
+ALTER TABLE mock_data
+    MODIFY name VARCHAR(255) NOT NULL,
+    MODIFY email VARCHAR(255) NOT NULL,
+    ADD UNIQUE INDEX uq_mock_data_email (email),
+    ADD INDEX idx_mock_data_name (name);
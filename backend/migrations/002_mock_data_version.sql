@@ -0,0 +1,9 @@
+-- Row versions for optimistic concurrency on /users/{id}.
+--
+-- Every write bumps version; GET /users/{id} and the write endpoints send
+-- it back as the ETag, and PUT/PATCH/DELETE with If-Match only apply when
+-- it still matches. Writes set it with version = LAST_INSERT_ID(version + 1)
+-- so the new value comes back in the OK packet, with no SELECT afterwards.
+
+ALTER TABLE mock_data
+    ADD COLUMN version INT UNSIGNED NOT NULL DEFAULT 1;
@@ -0,0 +1,19 @@
+-- Token revocation for the stateless JWT fast path.
+--
+-- Tokens now carry the user's name and email, so protected routes skip the
+-- user lookup. One row per user holds two cut-offs (epoch milliseconds):
+--   revoked_before_ms  tokens issued earlier are rejected
+--                      (password change, user deleted)
+--   stale_before_ms    tokens issued earlier have outdated claims and
+--                      fall back to the DB lookup (name/email change)
+-- Every worker keeps a copy in memory, re-reading rows by updated_ms.
+-- Rows older than ACCESS_TOKEN_EXPIRE_MINUTES no longer matter and can be
+-- deleted at any time.
+
+CREATE TABLE token_revocations (
+    user_id BIGINT NOT NULL PRIMARY KEY,
+    revoked_before_ms BIGINT NOT NULL DEFAULT 0,
+    stale_before_ms BIGINT NOT NULL DEFAULT 0,
+    updated_ms BIGINT NOT NULL,
+    INDEX idx_token_revocations_updated (updated_ms)
+);
@@ -0,0 +1,129 @@
+import base64
+import json
+
+from fastapi import HTTPException
+
+from .cache import count_cache
+
+# -------------------------------
+# LIST CONFIG
+# -------------------------------
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+USER_FIELDS = ("id", "name", "email", "version")
+DEFAULT_FIELDS = ("id", "name", "email")
+
+
+# -------------------------------
+# CURSORS
+# -------------------------------
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(raw)["id"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # only what encode_cursor writes: no floats (json reads Infinity too), bools or negatives
+    if type(last_id) is not int or last_id < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return last_id
+
+
+# -------------------------------
+# QUERY BUILDING
+# -------------------------------
+def parse_fields(fields: str | None) -> list[str]:
+    if not fields:
+        return list(DEFAULT_FIELDS)
+
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    if not selected:
+        # e.g. "fields=,": an empty SELECT list is a syntax error mid-export
+        raise HTTPException(status_code=400, detail="No fields selected")
+
+    unknown = [f for f in selected if f not in USER_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    return selected
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def build_filters(email_prefix: str | None, name_prefix: str | None):
+    # prefix LIKEs can use idx_mock_data_email / idx_mock_data_name
+    where = []
+    args = []
+
+    if email_prefix:
+        where.append("email LIKE %s")
+        args.append(_escape_like(email_prefix) + "%")
+
+    if name_prefix:
+        where.append("name LIKE %s")
+        args.append(_escape_like(name_prefix) + "%")
+
+    return where, args
+
+
+async def fetch_user_page(conn, fields, cursor, limit, email_prefix=None, name_prefix=None):
+    """
+    One keyset page of mock_data ordered by id.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    where, args = build_filters(email_prefix, name_prefix)
+    if cursor:
+        where.append("id > %s")
+        args.append(decode_cursor(cursor))
+
+    # id is always read so the cursor can be built; when it was not asked
+    # for it goes last and zip() below drops it
+    columns = fields if "id" in fields else fields + ["id"]
+    id_pos = columns.index("id")
+    sql = f"SELECT {', '.join(columns)} FROM mock_data"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id LIMIT %s"
+    args.append(limit + 1)
+
+    # plain tuples: cheaper to fetch than dict rows
+    rows = await conn.fetchall(sql, tuple(args), dictionary=False)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][id_pos])
+
+    return [dict(zip(fields, row)) for row in rows], next_cursor
+
+
+async def count_users(conn, email_prefix=None, name_prefix=None) -> int:
+    """
+    Total rows matching the filters, cached for COUNT_CACHE_TTL seconds.
+
+    Writes do not clear the cache: a total may lag them by up to the TTL,
+    which is what keeps COUNT(*) off most list requests.
+    """
+    key = (email_prefix or "", name_prefix or "")
+    total = count_cache.get(key)
+    if total is not None:
+        return total
+
+    where, args = build_filters(email_prefix, name_prefix)
+    sql = "SELECT COUNT(*) FROM mock_data"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+
+    row = await conn.fetchone(sql, tuple(args), dictionary=False)
+    total = row[0]
+    count_cache.set(key, total)
+    return total
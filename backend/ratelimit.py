@@ -0,0 +1,176 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException
+
+from .backends import BackendSlot, close_redis, connect_redis
+
+logger = logging.getLogger("backend.ratelimit")
+
+# -------------------------------
+# RATE LIMIT CONFIG
+# -------------------------------
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") != "0"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")      # memory | redis
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))   # memory backend only
+
+# "<requests>/<seconds>": bucket size and the window it refills over
+LOGIN_RATE_PER_IP = os.getenv("LOGIN_RATE_PER_IP", "20/60")
+LOGIN_RATE_PER_USER = os.getenv("LOGIN_RATE_PER_USER", "5/60")
+REGISTER_RATE_PER_IP = os.getenv("REGISTER_RATE_PER_IP", "5/60")
+
+
+# -------------------------------
+# BACKENDS
+# -------------------------------
+class MemoryBackend:
+    """
+    Token buckets in this worker's memory, least recently used dropped first.
+
+    With several workers each one keeps its own buckets, so the effective
+    limit is the configured one times the worker count; use the redis
+    backend to share them.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+
+            if tokens >= 1:
+                wait = 0.0
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / refill_per_second
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return wait
+
+    async def close(self):
+        pass
+
+
+class RedisBackend:
+    """Token buckets shared by every worker, one redis hash per key."""
+
+    # KEYS[1] bucket; ARGV capacity, refill/s, now (s) -> seconds to wait (0 = allowed)
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL):
+        self._redis = connect_redis(url, "RATE_LIMIT_BACKEND")
+        self._script = self._redis.register_script(self.SCRIPT)
+
+    async def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        wait = await self._script(keys=[f"ratelimit:{key}"], args=[capacity, refill_per_second, time.time()])
+        return float(wait)
+
+    async def close(self):
+        await close_redis(self._redis)
+
+
+_slot = BackendSlot("RATE_LIMIT_BACKEND", RATE_LIMIT_BACKEND, {"memory": MemoryBackend, "redis": RedisBackend})
+
+
+def get_backend():
+    return _slot.get()
+
+
+def set_backend(backend):
+    """Plug in any object with async take(key, capacity, refill_per_second) and close()."""
+    _slot.set(backend)
+
+
+async def close_backend():
+    await _slot.close()
+
+
+# -------------------------------
+# RULES
+# -------------------------------
+class RateLimit:
+    """A named token bucket rule, e.g. RateLimit("login_ip", "20/60")."""
+
+    def __init__(self, name: str, rate: str):
+        requests, seconds = rate.split("/")
+        self.name = name
+        self.capacity = int(requests)
+        self.refill_per_second = self.capacity / float(seconds)
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+
+    async def hit(self, key: str):
+        """Take one token for key, or raise 429 with Retry-After."""
+        if not RATE_LIMIT_ENABLED or self.capacity <= 0:
+            return
+
+        try:
+            wait = await get_backend().take(f"{self.name}:{key}", self.capacity, self.refill_per_second)
+        except Exception:
+            # a broken shared backend must not lock everybody out: fail open
+            self.errors += 1
+            logger.exception("rate limit backend failed for %s", self.name)
+            return
+
+        if wait > 0:
+            self.limited += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too many attempts, try again later",
+                headers={"Retry-After": str(max(1, round(wait)))}
+            )
+        self.allowed += 1
+
+    def stats(self):
+        return {
+            "capacity": self.capacity,
+            "refill_per_second": self.refill_per_second,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "errors": self.errors,
+        }
+
+
+login_per_ip = RateLimit("login_ip", LOGIN_RATE_PER_IP)
+login_per_user = RateLimit("login_user", LOGIN_RATE_PER_USER)
+register_per_ip = RateLimit("register_ip", REGISTER_RATE_PER_IP)
+
+
+def client_ip(request) -> str:
+    # behind a proxy run uvicorn with --proxy-headers so this is the real client
+    return request.client.host if request.client else "unknown"
+
+
+def ratelimit_stats():
+    return {rule.name: rule.stats() for rule in (login_per_ip, login_per_user, register_per_ip)}
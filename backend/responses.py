@@ -0,0 +1,30 @@
+import json
+
+from fastapi.responses import JSONResponse
+
+from .metrics import timed
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    """Encode to compact JSON bytes with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Default response class: orjson encoding, timed as the "render" phase.
+
+    Handlers that already hold plain rows return it directly, which also
+    skips FastAPI's jsonable_encoder pass over the payload.
+    """
+
+    def render(self, content) -> bytes:
+        with timed("render"):
+            return dumps(content)
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from .db import connection
+
+logger = logging.getLogger("backend.revocations")
+
+# -------------------------------
+# REVOCATION CONFIG
+# -------------------------------
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "5"))
+REVOCATION_CLOCK_SKEW_MS = 5000     # re-read this much history each refresh, for clock skew between workers
+TOKEN_LIFETIME_MS = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60")) * 60 * 1000   # same variable as auth_routes
+
+UPSERT_REVOCATION = """
+    INSERT INTO token_revocations (user_id, revoked_before_ms, stale_before_ms, updated_ms)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        revoked_before_ms = GREATEST(revoked_before_ms, VALUES(revoked_before_ms)),
+        stale_before_ms = GREATEST(stale_before_ms, VALUES(stale_before_ms)),
+        updated_ms = VALUES(updated_ms)
+"""
+
+# token states
+VALID = "valid"
+STALE = "stale"         # still valid, but its name/email claims may be out of date
+REVOKED = "revoked"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class RevocationList:
+    """
+    In-memory copy of token_revocations, refreshed in the background.
+
+    Per user it keeps two cut-offs: tokens issued before revoked_before
+    are rejected (password change, deletion); tokens issued before
+    stale_before carry outdated claims and need a DB lookup (name/email
+    change). Writes made in this worker apply at once, other workers'
+    within REVOCATION_REFRESH_SECONDS.
+    """
+
+    def __init__(self):
+        self._entries = {}          # user_id -> (revoked_before_ms, stale_before_ms, updated_ms)
+        self._since_ms = 0
+        self._lock = threading.Lock()
+        self.ready = False
+        self.refreshed_at = 0.0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def _merge(self, user_id, revoked_before_ms, stale_before_ms, updated_ms):
+        old = self._entries.get(user_id)
+        if old:
+            revoked_before_ms = max(revoked_before_ms, old[0])
+            stale_before_ms = max(stale_before_ms, old[1])
+            updated_ms = max(updated_ms, old[2])
+        self._entries[user_id] = (revoked_before_ms, stale_before_ms, updated_ms)
+
+    def check(self, user_id: int, issued_at: float | None) -> str:
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is None:
+            return VALID
+
+        issued_ms = (issued_at or 0) * 1000
+        if issued_ms < entry[0]:
+            return REVOKED
+        if issued_ms < entry[1]:
+            return STALE
+        return VALID
+
+    def record(self, user_id: int, revoked_before_ms: int, stale_before_ms: int, updated_ms: int):
+        with self._lock:
+            self._merge(user_id, revoked_before_ms, stale_before_ms, updated_ms)
+
+    def record_many(self, rows):
+        """Apply rows returned by revoke_tokens, once their transaction has committed."""
+        with self._lock:
+            for row in rows:
+                self._merge(*row)
+
+    async def refresh(self):
+        """Load rows changed since the last refresh (everything still relevant the first time)."""
+        now = _now_ms()
+        since = max(self._since_ms - REVOCATION_CLOCK_SKEW_MS, now - TOKEN_LIFETIME_MS)
+
+        # the primary: a lagging replica would delay revocations
+        async with connection() as conn:
+            rows = await conn.fetchall(
+                "SELECT user_id, revoked_before_ms, stale_before_ms, updated_ms "
+                "FROM token_revocations WHERE updated_ms >= %s",
+                (since,),
+                dictionary=False
+            )
+
+        with self._lock:
+            for row in rows:
+                self._merge(*row)
+                self._since_ms = max(self._since_ms, row[3])
+
+            # once every token issued before a cut-off has expired, the entry is moot
+            expired = now - TOKEN_LIFETIME_MS
+            for user_id in [u for u, e in self._entries.items() if max(e[0], e[1]) < expired]:
+                del self._entries[user_id]
+
+        self.ready = True
+        self.refreshed_at = time.monotonic()
+        self.refreshes += 1
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the copy can be trusted: it missed no more than a couple of refreshes."""
+        return self.ready and time.monotonic() - self.refreshed_at < 3 * REVOCATION_REFRESH_SECONDS
+
+    async def run(self):
+        """Refresh forever; started by the app's lifespan."""
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # tokens fall back to the DB lookup until a refresh succeeds again
+                self.refresh_errors += 1
+                logger.exception("token revocation refresh failed")
+            await asyncio.sleep(REVOCATION_REFRESH_SECONDS)
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "ready": int(self.ready),
+            "fresh": int(self.fresh),
+            "entries": size,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+        }
+
+
+revocations = RevocationList()
+
+
+async def revoke_tokens(conn, user_ids, claims_only: bool = False):
+    """
+    Write the revocation of the tokens issued so far to user_ids.
+
+    claims_only marks them stale instead (name/email changed): they keep
+    working but the user is read from the DB again.
+
+    Run it in the transaction of the write that causes it, so neither
+    commits without the other, and pass the rows it returns to
+    revocations.record_many() once that transaction has committed.
+    """
+    now = _now_ms()
+    rows = [(user_id, 0 if claims_only else now, now, now) for user_id in user_ids]
+    if rows:
+        await conn.executemany(UPSERT_REVOCATION, rows)
+    return rows
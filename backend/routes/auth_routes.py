@@ -1,27 +1,53 @@
-from fastapi import APIRouter, HTTPException, Depends, Security
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Security
 from pydantic import BaseModel, EmailStr
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from ..db import get_db
+import hashlib
+import os
+import time
+import uuid
+from typing import Optional
+from ..cache import token_cache, user_cache
+from ..db import IntegrityError, get_conn, get_read_conn
+from ..email_index import email_index, email_taken
+from ..hashing import get_password_hash, verify_password
+from ..metrics import timed
+from ..pagination import DEFAULT_LIMIT, MAX_LIMIT, count_users, fetch_user_page, parse_fields
+from ..ratelimit import client_ip, login_per_ip, login_per_user, register_per_ip
+from ..responses import FastJSONResponse
+from ..revocations import REVOKED, VALID, revocations
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
 router = APIRouter()
 
-# -------------------------------
-# PASSWORD CONFIG
-# -------------------------------
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto"
-)
-
 # -------------------------------
 # JWT CONFIG
 # -------------------------------
 SECRET_KEY = "CHANGE_THIS_SECRET"   # later env var lo pettochu
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+
+
+def _parse_keys(value: str) -> dict:
+    keys = {}
+    for item in value.split(","):
+        kid, sep, secret = item.strip().partition(":")
+        if sep and kid and secret:
+            keys[kid] = secret
+    return keys
+
+
+# "kid:secret,kid:secret": the first one signs new tokens, all of them verify.
+# To rotate, put the new key first and drop the old one once the tokens it
+# signed have expired.
+_CONFIGURED_KEYS = _parse_keys(os.getenv("JWT_KEYS", ""))
+JWT_KEYS = _CONFIGURED_KEYS or {"default": SECRET_KEY}
+SIGNING_KID = next(iter(JWT_KEYS))
+
+# Tokens issued before tokens carried a key id. Without JWT_KEYS they were
+# signed with SECRET_KEY; once JWT_KEYS is set they are only accepted while
+# JWT_LEGACY_KEY holds the secret they were signed with; unset it to retire them.
+JWT_LEGACY_KEY = os.getenv("JWT_LEGACY_KEY") or (None if _CONFIGURED_KEYS else SECRET_KEY)
 
 # -------------------------------
 # MODELS
@@ -37,25 +63,16 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
-# -------------------------------
-# PASSWORD UTILS
-# -------------------------------
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-
 # -------------------------------
 # JWT UTILS
 # -------------------------------
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    # iat in milliseconds: a revocation and a login right after it must not share a timestamp
+    to_encode.update({"exp": expire, "iat": round(time.time(), 3), "jti": uuid.uuid4().hex})
+    with timed("jwt_encode"):
+        return jwt.encode(to_encode, JWT_KEYS[SIGNING_KID], algorithm=ALGORITHM, headers={"kid": SIGNING_KID})
 
 
 # ✅ IMPORTANT FIX (no leading slash)
@@ -65,24 +82,50 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 # -------------------------------
 # USER HELPERS
 # -------------------------------
-def get_user_by_id(user_id: int):
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
+async def get_user_by_id(conn, user_id: int):
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
 
-    cur.execute(
+    user = await conn.fetchone(
         "SELECT id, name, email FROM mock_data WHERE id=%s",
         (user_id,)
     )
-    user = cur.fetchone()
+    if user:
+        user_cache.set(user_id, user)
 
-    cur.close()
-    conn.close()
     return user
 
 
-def get_current_user(token: str = Security(oauth2_scheme)):
+def _verification_key(token: str) -> str:
+    kid = jwt.get_unverified_header(token).get("kid")
+    if kid is None:
+        if JWT_LEGACY_KEY is None:
+            raise JWTError("Token has no key id")
+        return JWT_LEGACY_KEY
+    # the header is unverified input: a list or dict kid must not reach the dict lookup
+    if not isinstance(kid, str) or kid not in JWT_KEYS:
+        raise JWTError("Unknown key id")
+    return JWT_KEYS[kid]
+
+
+def decode_token(token: str) -> dict:
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+
+    with timed("jwt_decode"):
+        payload = jwt.decode(token, _verification_key(token), algorithms=[ALGORITHM])
+
+    # never keep a token cached past its own expiry
+    token_cache.set(key, payload, ttl=payload["exp"] - time.time() if "exp" in payload else None)
+    return payload
+
+
+async def get_current_user(token: str = Security(oauth2_scheme), conn=Depends(get_read_conn)):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         user_id = payload.get("sub")
 
         if user_id is None:
@@ -94,7 +137,17 @@ def get_current_user(token: str = Security(oauth2_scheme)):
             detail=f"Invalid token: {str(e)}"
         )
 
-    user = get_user_by_id(int(user_id))
+    user_id = int(user_id)
+    status = revocations.check(user_id, payload.get("iat"))
+    if status == REVOKED:
+        raise HTTPException(status_code=401, detail="Token revoked")
+
+    # fast path: the token carries the user and nothing newer is known about it
+    if status == VALID and "email" in payload and revocations.fresh:
+        return {"id": user_id, "name": payload["name"], "email": payload["email"]}
+
+    # tokens without claims, with stale claims, or no trustworthy revocation list
+    user = await get_user_by_id(conn, user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
@@ -107,31 +160,26 @@ def get_current_user(token: str = Security(oauth2_scheme)):
 
 # 🔐 REGISTER
 @router.post("/register", status_code=201)
-def register(user: RegisterModel):
-    conn = get_db()
-    cur = conn.cursor()
+async def register(user: RegisterModel, request: Request, conn=Depends(get_conn)):
+    await register_per_ip.hit(client_ip(request))
 
-    cur.execute(
-        "SELECT id FROM mock_data WHERE email=%s",
-        (user.email,)
-    )
-    if cur.fetchone():
-        cur.close()
-        conn.close()
+    # rejected before any bcrypt work
+    if await email_taken(conn, user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = get_password_hash(user.password)
-
-    cur.execute(
-        "INSERT INTO mock_data (name, email, password) VALUES (%s, %s, %s)",
-        (user.name, user.email, hashed_password)
-    )
+    hashed_password = await get_password_hash(user.password)
 
-    conn.commit()
-    user_id = cur.lastrowid
+    try:
+        result = await conn.execute(
+            "INSERT INTO mock_data (name, email, password) VALUES (%s, %s, %s)",
+            (user.name, user.email, hashed_password)
+        )
+    except IntegrityError:
+        # registered meanwhile by another request or worker
+        raise HTTPException(status_code=400, detail="Email already registered")
 
-    cur.close()
-    conn.close()
+    user_id = result.lastrowid
+    email_index.add(user.email)
 
     return {
         "message": "User registered successfully",
@@ -141,27 +189,24 @@ def register(user: RegisterModel):
 
 # 🔐 LOGIN
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), conn=Depends(get_conn)):
+    # both buckets are checked before the DB lookup and the bcrypt verify
+    await login_per_ip.hit(client_ip(request))
+    await login_per_user.hit(form_data.username.strip().lower())
 
-    cur.execute(
+    user = await conn.fetchone(
         "SELECT * FROM mock_data WHERE email=%s",
         (form_data.username,)
     )
-    user = cur.fetchone()
-
-    cur.close()
-    conn.close()
 
     if not user:
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
-    if not verify_password(form_data.password, user["password"]):
+    if not await verify_password(form_data.password, user["password"]):
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
     access_token = create_access_token(
-        data={"sub": str(user["id"])},
+        data={"sub": str(user["id"]), "name": user["name"], "email": user["email"]},
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
 
@@ -175,21 +220,30 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
 # 📊 VIEW DB DATA (PROTECTED)
 # -------------------------------
 @router.get("/db-users")
-def get_all_db_users(current_user=Depends(get_current_user)):
+async def get_all_db_users(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    email_prefix: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    with_count: bool = False,
+    current_user=Depends(get_current_user),
+    conn=Depends(get_read_conn)
+):
     """
-    Returns all users from DB (JWT Protected)
+    Returns users from DB one page at a time (JWT Protected).
+    Pass next_cursor back as ?cursor= to get the following page.
     """
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-
-    cur.execute("SELECT id, name, email FROM mock_data")
-    users = cur.fetchall()
+    users, next_cursor = await fetch_user_page(
+        conn, parse_fields(fields), cursor, limit, email_prefix, name_prefix
+    )
 
-    cur.close()
-    conn.close()
+    count = await count_users(conn, email_prefix, name_prefix) if with_count else None
 
-    return {
+    # rows are plain dicts already: skip jsonable_encoder
+    return FastJSONResponse({
         "logged_in_user": current_user,
-        "count": len(users),
-        "data": users
-    }
+        "count": count,
+        "data": users,
+        "next_cursor": next_cursor
+    })
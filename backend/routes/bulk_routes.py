@@ -0,0 +1,280 @@
+from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel, EmailStr
+from typing import Optional
+from ..cache import user_cache
+from ..db import IntegrityError, get_conn
+from ..email_index import email_index
+from ..hashing import get_password_hashes
+from ..revocations import revocations, revoke_tokens
+from ..routes.auth_routes import get_current_user
+from ..routes.user_routes import UserCreate
+
+# registered before user_routes so /users/bulk is not taken for /users/{id}
+router = APIRouter(prefix="/users", tags=["Users"])
+
+# -------------------------------
+# BULK CONFIG
+# -------------------------------
+MAX_BULK_ITEMS = 10000
+MAX_BULK_PASSWORDS = 200    # ~50 s of bcrypt at cost 12 on one process, the share a worker gets under serve
+BULK_CHUNK_SIZE = 1000      # rows per statement and per transaction
+
+INSERT_USER = "INSERT INTO mock_data (name, email, password) VALUES (%s, %s, %s)"
+
+
+# -------------------------------
+# MODELS
+# -------------------------------
+class BulkCreate(BaseModel):
+    users: list[UserCreate]
+
+
+class BulkUserPatch(BaseModel):
+    id: int
+    name: Optional[str] = None
+    email: Optional[EmailStr] = None
+    password: Optional[str] = None
+
+
+class BulkUpdate(BaseModel):
+    users: list[BulkUserPatch]
+
+
+class BulkDelete(BaseModel):
+    ids: list[int]
+
+
+# -------------------------------
+# HELPERS
+# -------------------------------
+def _check_size(items):
+    if not items:
+        raise HTTPException(status_code=400, detail="No items provided")
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per request")
+
+
+def _check_passwords(n: int):
+    # every password is a bcrypt hash: checked before any of them starts
+    if n > MAX_BULK_PASSWORDS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_PASSWORDS} passwords per request")
+
+
+def _chunks(items, size=BULK_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _placeholders(n: int) -> str:
+    return ", ".join(["%s"] * n)
+
+
+def _error(index: int, detail: str) -> dict:
+    return {"index": index, "status": "error", "detail": detail}
+
+
+def _summary(results, ok_status: str) -> dict:
+    ok = sum(1 for r in results if r["status"] == ok_status)
+    return {
+        ok_status: ok,
+        "failed": len(results) - ok,
+        "results": results
+    }
+
+
+async def _ids_by_email(conn, emails) -> dict:
+    """lower(email) -> id for the emails that exist, one IN query per chunk."""
+    found = {}
+    for chunk in _chunks(emails):
+        rows = await conn.fetchall(
+            f"SELECT id, email FROM mock_data WHERE email IN ({_placeholders(len(chunk))})",
+            tuple(chunk),
+            dictionary=False
+        )
+        found.update((email.lower(), user_id) for user_id, email in rows)
+    return found
+
+
+async def _existing_ids(conn, ids) -> set:
+    found = set()
+    for chunk in _chunks(ids):
+        rows = await conn.fetchall(
+            f"SELECT id FROM mock_data WHERE id IN ({_placeholders(len(chunk))})",
+            tuple(chunk),
+            dictionary=False
+        )
+        found.update(row[0] for row in rows)
+    return found
+
+
+async def _write_chunk(conn, sql, rows, revoke=(), claims_only=False):
+    """
+    Run one executemany in its own transaction.
+
+    revoke, when given, holds the user id each row writes: their tokens
+    are revoked in the same transaction (see revoke_tokens). If a unique
+    key trips (e.g. a concurrent insert of the same email), the chunk is
+    rolled back and replayed row by row, one transaction each. Returns the
+    positions of the rows that failed.
+    """
+    try:
+        async with conn.transaction():
+            await conn.executemany(sql, rows)
+            revoked = await revoke_tokens(conn, revoke, claims_only)
+        revocations.record_many(revoked)
+        return set()
+    except IntegrityError:
+        pass
+
+    failed = set()
+    for pos, row in enumerate(rows):
+        try:
+            async with conn.transaction():
+                await conn.execute(sql, row)
+                revoked = await revoke_tokens(conn, revoke[pos:pos + 1], claims_only)
+        except IntegrityError:
+            failed.add(pos)
+            continue
+        revocations.record_many(revoked)
+    return failed
+
+
+# -------------------------------
+# ROUTES
+# -------------------------------
+
+# 🔐 BULK CREATE
+@router.post("/bulk")
+async def bulk_create_users(payload: BulkCreate, current_user=Depends(get_current_user), conn=Depends(get_conn)):
+    users = payload.users
+    _check_size(users)
+    _check_passwords(len(users))
+    results = [None] * len(users)
+
+    # duplicates inside the request
+    seen = set()
+    for i, user in enumerate(users):
+        email = user.email.lower()
+        if email in seen:
+            results[i] = _error(i, "Duplicate email in request")
+        seen.add(email)
+
+    # duplicates already in the table: the email index rules most of them
+    # out, one IN query per chunk for the rest
+    pending = [i for i in range(len(users)) if results[i] is None]
+    unsure = [users[i].email for i in pending if not email_index.is_free(users[i].email)]
+    taken = await _ids_by_email(conn, unsure)
+    for i in pending:
+        if users[i].email.lower() in taken:
+            results[i] = _error(i, "Email already exists")
+
+    pending = [i for i in pending if results[i] is None]
+    hashes = await get_password_hashes([users[i].password for i in pending])
+
+    for chunk in _chunks(list(zip(pending, hashes))):
+        rows = [(users[i].name, users[i].email, hashed) for i, hashed in chunk]
+        failed = await _write_chunk(conn, INSERT_USER, rows)
+
+        for pos in failed:
+            results[chunk[pos][0]] = _error(chunk[pos][0], "Email already exists")
+
+        inserted = [i for i, _ in chunk if results[i] is None]
+        ids = await _ids_by_email(conn, [users[i].email for i in inserted])
+        for i in inserted:
+            results[i] = {"index": i, "status": "created", "id": ids[users[i].email.lower()]}
+            email_index.add(users[i].email)
+
+    return _summary(results, "created")
+
+
+# 🔐 BULK PARTIAL UPDATE
+@router.patch("/bulk")
+async def bulk_patch_users(payload: BulkUpdate, current_user=Depends(get_current_user), conn=Depends(get_conn)):
+    items = payload.users
+    _check_size(items)
+    _check_passwords(sum(1 for item in items if item.password is not None))
+    results = [None] * len(items)
+
+    seen = set()
+    for i, item in enumerate(items):
+        if item.name is None and item.email is None and item.password is None:
+            results[i] = _error(i, "No fields provided to update")
+        elif item.id in seen:
+            results[i] = _error(i, "Duplicate id in request")
+        seen.add(item.id)
+
+    pending = [i for i in range(len(items)) if results[i] is None]
+    existing = await _existing_ids(conn, [items[i].id for i in pending])
+    for i in pending:
+        if items[i].id not in existing:
+            results[i] = _error(i, "User not found")
+
+    pending = [i for i in pending if results[i] is None]
+    with_password = [i for i in pending if items[i].password is not None]
+    hashes = dict(zip(
+        with_password,
+        await get_password_hashes([items[i].password for i in with_password])
+    ))
+
+    # items that set the same columns share one UPDATE statement
+    groups = {}
+    for i in pending:
+        columns = tuple(c for c in ("name", "email", "password") if getattr(items[i], c) is not None)
+        groups.setdefault(columns, []).append(i)
+
+    for columns, indexes in groups.items():
+        sql = f"UPDATE mock_data SET {', '.join(c + '=%s' for c in columns)}, version=version + 1 WHERE id=%s"
+
+        for chunk in _chunks(indexes):
+            rows = [
+                tuple(hashes[i] if c == "password" else getattr(items[i], c) for c in columns) + (items[i].id,)
+                for i in chunk
+            ]
+            failed = await _write_chunk(
+                conn, sql, rows,
+                revoke=[items[i].id for i in chunk], claims_only="password" not in columns
+            )
+
+            for pos, i in enumerate(chunk):
+                user_cache.pop(items[i].id)
+                if pos in failed:
+                    results[i] = _error(i, "Email already exists")
+                else:
+                    results[i] = {"index": i, "status": "updated", "id": items[i].id}
+                    if "email" in columns:
+                        email_index.add(items[i].email)
+
+    return _summary(results, "updated")
+
+
+# 🔐 BULK DELETE
+@router.delete("/bulk")
+async def bulk_delete_users(payload: BulkDelete, current_user=Depends(get_current_user), conn=Depends(get_conn)):
+    ids = payload.ids
+    _check_size(ids)
+
+    existing = await _existing_ids(conn, list(set(ids)))
+    for chunk in _chunks(sorted(existing)):
+        async with conn.transaction():
+            await conn.execute(
+                f"DELETE FROM mock_data WHERE id IN ({_placeholders(len(chunk))})",
+                tuple(chunk)
+            )
+            revoked = await revoke_tokens(conn, chunk)
+
+        revocations.record_many(revoked)
+        for user_id in chunk:
+            user_cache.pop(user_id)
+
+    results = []
+    deleted = set()
+    for i, user_id in enumerate(ids):
+        if user_id in deleted:
+            results.append(_error(i, "Duplicate id in request"))
+        elif user_id in existing:
+            deleted.add(user_id)
+            results.append({"index": i, "status": "deleted", "id": user_id})
+        else:
+            results.append(_error(i, "User not found"))
+
+    return _summary(results, "deleted")
@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..metrics import lifecycle, render_metrics
+from ..responses import FastJSONResponse
+
+router = APIRouter(tags=["Metrics"])
+
+
+# -------------------------------
+# 📈 PROMETHEUS METRICS
+# -------------------------------
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(
+        render_metrics(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+# -------------------------------
+# ❤️ HEALTH
+# -------------------------------
+@router.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the worker's event loop is answering."""
+    return {"status": "ok"}
+
+
+@router.get("/readyz", include_in_schema=False)
+async def readyz():
+    """Readiness: warmed up and not shutting down."""
+    if not lifecycle["ready"]:
+        return FastJSONResponse({"status": "unavailable"}, status_code=503)
+    return {"status": "ready"}
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
 from pydantic import BaseModel, EmailStr
-from typing import Optional
-from ..db import get_db
-from ..routes.auth_routes import get_current_user, get_password_hash
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
+from ..cache import user_cache
+from ..db import IntegrityError, get_conn, get_read_conn
+from ..email_index import email_index, email_taken
+from ..export import EXPORT_BATCH_SIZE, MEDIA_TYPES, stream_users
+from ..hashing import get_password_hash
+from ..pagination import DEFAULT_LIMIT, MAX_LIMIT, count_users, fetch_user_page, parse_fields
+from ..responses import FastJSONResponse
+from ..revocations import revocations, revoke_tokens
+from ..routes.auth_routes import get_current_user
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -22,56 +30,124 @@ class UserUpdate(BaseModel):
     password: Optional[str] = None
 
 
+# -------------------------------
+# ETAGS
+# -------------------------------
+def _etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _if_match_versions(if_match: Optional[str]):
+    """None for an unconditional write, else the versions it may apply to."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+
+    # If-Match uses strong comparison: weak or foreign tags never match
+    versions = []
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+
+    if not versions:
+        raise HTTPException(status_code=412, detail="User was modified, fetch it again")
+    return versions
+
+
+async def _write_versioned(conn, id: int, sql: str, args: tuple, versions):
+    """
+    Run a single-row UPDATE/DELETE, guarded by the If-Match versions.
+
+    Raises 409 on a unique-key clash, 412 on a stale version and 404 when
+    the row is gone.
+    """
+    if versions:
+        sql += f" AND version IN ({', '.join(['%s'] * len(versions))})"
+        args += tuple(versions)
+
+    try:
+        result = await conn.execute(sql, args)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Email already exists")
+
+    if result.rowcount == 0:
+        # only the failure path pays for telling 404 and 412 apart
+        if versions and await conn.fetchone("SELECT id FROM mock_data WHERE id=%s", (id,), dictionary=False):
+            raise HTTPException(status_code=412, detail="User was modified, fetch it again")
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return result
+
+
 # -------------------------------
 # ROUTES
 # -------------------------------
 
 # 🔐 GET ALL USERS
 @router.get("")
-def get_users(current_user=Depends(get_current_user)):
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-
-    cur.execute("SELECT id, name, email FROM mock_data")
-    users = cur.fetchall()
-
-    cur.close()
-    conn.close()
+async def get_users(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    email_prefix: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    with_count: bool = False,
+    current_user=Depends(get_current_user),
+    conn=Depends(get_read_conn)
+):
+    users, next_cursor = await fetch_user_page(
+        conn, parse_fields(fields), cursor, limit, email_prefix, name_prefix
+    )
 
-    return {
-        "count": len(users),
-        "data": users
-    }
+    count = await count_users(conn, email_prefix, name_prefix) if with_count else None
+
+    # rows are plain dicts already: skip jsonable_encoder
+    return FastJSONResponse({
+        "count": count,
+        "data": users,
+        "next_cursor": next_cursor
+    })
+
+
+# 🔐 EXPORT ALL USERS (streamed)
+@router.get("/export")
+async def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    fields: Optional[str] = None,
+    gzip: bool = False,
+    batch_size: int = Query(EXPORT_BATCH_SIZE, ge=100, le=50000),
+    current_user=Depends(get_current_user)
+):
+    headers = {"Content-Disposition": f'attachment; filename="users.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        stream_users(parse_fields(fields), format, gzip, batch_size),
+        media_type=MEDIA_TYPES[format],
+        headers=headers
+    )
 
 
 # 🔐 CREATE USER
 @router.post("", status_code=201)
-def create_user(user: UserCreate, current_user=Depends(get_current_user)):
-    conn = get_db()
-    cur = conn.cursor()
-
-    # check duplicate email
-    cur.execute(
-        "SELECT id FROM mock_data WHERE email=%s",
-        (user.email,)
-    )
-    if cur.fetchone():
-        cur.close()
-        conn.close()
+async def create_user(user: UserCreate, current_user=Depends(get_current_user), conn=Depends(get_conn)):
+    # check duplicate email (before hashing)
+    if await email_taken(conn, user.email):
         raise HTTPException(status_code=400, detail="Email already exists")
 
-    hashed_password = get_password_hash(user.password)
-
-    cur.execute(
-        "INSERT INTO mock_data (name, email, password) VALUES (%s, %s, %s)",
-        (user.name, user.email, hashed_password)
-    )
+    hashed_password = await get_password_hash(user.password)
 
-    conn.commit()
-    user_id = cur.lastrowid
+    try:
+        result = await conn.execute(
+            "INSERT INTO mock_data (name, email, password) VALUES (%s, %s, %s)",
+            (user.name, user.email, hashed_password)
+        )
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Email already exists")
 
-    cur.close()
-    conn.close()
+    user_id = result.lastrowid
+    email_index.add(user.email)
 
     return {
         "message": "User created successfully",
@@ -79,95 +155,144 @@ def create_user(user: UserCreate, current_user=Depends(get_current_user)):
     }
 
 
-# 🔐 FULL UPDATE (PUT)
-@router.put("/{id}")
-def update_user(id: int, user: UserCreate, current_user=Depends(get_current_user)):
-    hashed_password = get_password_hash(user.password)
-
-    conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute(
-        """
-        UPDATE mock_data
-        SET name=%s, email=%s, password=%s
-        WHERE id=%s
-        """,
-        (user.name, user.email, hashed_password, id)
+# 🔐 GET ONE USER
+@router.get("/{id}")
+async def get_user(
+    id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user=Depends(get_current_user),
+    conn=Depends(get_read_conn)
+):
+    user = await conn.fetchone(
+        "SELECT id, name, email, version FROM mock_data WHERE id=%s",
+        (id,)
     )
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    conn.commit()
+    etag = _etag(user["version"])
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers={"ETag": etag})
 
-    if cur.rowcount == 0:
-        cur.close()
-        conn.close()
-        raise HTTPException(status_code=404, detail="User not found")
+    response.headers["ETag"] = etag
+    return user
 
-    cur.close()
-    conn.close()
 
-    return {"message": "User updated successfully"}
+# 🔐 FULL UPDATE (PUT)
+@router.put("/{id}")
+async def update_user(
+    id: int,
+    user: UserCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user=Depends(get_current_user),
+    conn=Depends(get_conn)
+):
+    versions = _if_match_versions(if_match)
+    hashed_password = await get_password_hash(user.password)
+
+    async with conn.transaction():
+        # LAST_INSERT_ID(expr) hands the new version back with the OK packet
+        result = await _write_versioned(
+            conn, id,
+            """
+            UPDATE mock_data
+            SET name=%s, email=%s, password=%s, version=LAST_INSERT_ID(version + 1)
+            WHERE id=%s
+            """,
+            (user.name, user.email, hashed_password, id),
+            versions
+        )
+        # the password was replaced: sessions issued so far end here
+        revoked = await revoke_tokens(conn, [id])
+    version = result.lastrowid
+
+    revocations.record_many(revoked)
+    user_cache.pop(id)
+    email_index.add(user.email)
+
+    response.headers["ETag"] = _etag(version)
+    return {
+        "message": "User updated successfully",
+        "data": {"id": id, "name": user.name, "email": user.email, "version": version}
+    }
 
 
 # 🔐 PARTIAL UPDATE (PATCH)
 @router.patch("/{id}")
-def patch_user(id: int, user: UserUpdate, current_user=Depends(get_current_user)):
+async def patch_user(
+    id: int,
+    user: UserUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user=Depends(get_current_user),
+    conn=Depends(get_conn)
+):
+    versions = _if_match_versions(if_match)
     fields = []
     values = []
+    changed = {}
 
     if user.name is not None:
         fields.append("name=%s")
         values.append(user.name)
+        changed["name"] = user.name
 
     if user.email is not None:
         fields.append("email=%s")
         values.append(user.email)
+        changed["email"] = user.email
 
     if user.password is not None:
         fields.append("password=%s")
-        values.append(get_password_hash(user.password))
+        values.append(await get_password_hash(user.password))
 
     if not fields:
         raise HTTPException(status_code=400, detail="No fields provided to update")
 
+    fields.append("version=LAST_INSERT_ID(version + 1)")
     values.append(id)
 
-    conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute(
-        f"UPDATE mock_data SET {', '.join(fields)} WHERE id=%s",
-        tuple(values)
-    )
-
-    conn.commit()
-
-    if cur.rowcount == 0:
-        cur.close()
-        conn.close()
-        raise HTTPException(status_code=404, detail="User not found")
-
-    cur.close()
-    conn.close()
+    async with conn.transaction():
+        result = await _write_versioned(
+            conn, id,
+            f"UPDATE mock_data SET {', '.join(fields)} WHERE id=%s",
+            tuple(values),
+            versions
+        )
+        # a new password ends existing sessions; a new name/email only outdates their claims
+        revoked = await revoke_tokens(conn, [id], claims_only=user.password is None)
+    version = result.lastrowid
+
+    revocations.record_many(revoked)
+    user_cache.pop(id)
+    if user.email is not None:
+        email_index.add(user.email)
 
-    return {"message": "User updated successfully"}
+    # only the columns written are known without reading the row back
+    response.headers["ETag"] = _etag(version)
+    return {
+        "message": "User updated successfully",
+        "data": {"id": id, **changed, "version": version}
+    }
 
 
 # 🔐 DELETE USER
 @router.delete("/{id}")
-def delete_user(id: int, current_user=Depends(get_current_user)):
-    conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute("DELETE FROM mock_data WHERE id=%s", (id,))
-    conn.commit()
-
-    if cur.rowcount == 0:
-        cur.close()
-        conn.close()
-        raise HTTPException(status_code=404, detail="User not found")
-
-    cur.close()
-    conn.close()
+async def delete_user(
+    id: int,
+    if_match: Optional[str] = Header(None),
+    current_user=Depends(get_current_user),
+    conn=Depends(get_conn)
+):
+    versions = _if_match_versions(if_match)
+
+    async with conn.transaction():
+        await _write_versioned(conn, id, "DELETE FROM mock_data WHERE id=%s", (id,), versions)
+        revoked = await revoke_tokens(conn, [id])
+
+    revocations.record_many(revoked)
+    user_cache.pop(id)
 
     return {"message": "User deleted successfully"}
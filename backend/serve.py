@@ -0,0 +1,165 @@
+"""
+Production entry point for the API.
+
+    python -m backend.serve
+    python -m backend.serve --workers 4 --port 8080
+    SERVER=gunicorn python -m backend.serve
+
+Runs backend.main:app with one worker process per CPU core, on uvloop
+and httptools when they are installed, with keep-alive and listen
+backlog set for running behind a load balancer. SERVER=gunicorn runs the
+same app under gunicorn's process manager with uvicorn workers (needs
+gunicorn installed). The workers share the CPU cores for password hashing
+and DB_POOL_TOTAL connections per database, unless HASH_WORKERS or
+DB_POOL_SIZE set a per-worker value. No worker gets fewer than
+DB_POOL_MIN_PER_WORKER connections: an export stream or an open
+transaction holds one for its whole length.
+
+A worker accepts connections only after the lifespan warm-up has
+finished. On SIGTERM /readyz starts failing while the worker keeps
+serving for SHUTDOWN_DELAY seconds; it then stops accepting, lets
+in-flight requests finish for up to GRACEFUL_TIMEOUT seconds and runs
+the lifespan shutdown. Give the orchestrator a termination grace period
+longer than both together.
+"""
+import argparse
+import importlib.util
+import logging
+import os
+
+logger = logging.getLogger("backend.serve")
+
+# -------------------------------
+# SERVER CONFIG
+# -------------------------------
+APP = "backend.main:app"
+
+SERVER = os.getenv("SERVER", "uvicorn")                 # uvicorn | gunicorn
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", str(os.cpu_count() or 1)))
+DB_POOL_MIN_PER_WORKER = int(os.getenv("DB_POOL_MIN_PER_WORKER", "4"))
+DB_POOL_TOTAL = int(os.getenv("DB_POOL_TOTAL", "0"))     # connections the whole server opens per database; 0 = workers x the minimum
+KEEPALIVE = int(os.getenv("KEEPALIVE", "65"))            # seconds; keep above the load balancer's idle timeout
+BACKLOG = int(os.getenv("BACKLOG", "2048"))              # pending connections the kernel queues per socket
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")   # proxies trusted for X-Forwarded-For
+ACCESS_LOG = os.getenv("ACCESS_LOG", "0") == "1"
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+LOOP = "uvloop" if _installed("uvloop") else "asyncio"
+HTTP = "httptools" if _installed("httptools") else "h11"
+
+
+def _split_hash_workers(workers: int):
+    # every web worker starts its own bcrypt process pool: share the cores
+    # out instead of running workers x cpu_count hashing processes. Bulk
+    # requests hash on the same pool (BULK_HASH_SLOTS of it), so this is
+    # every hashing process the worker runs.
+    if "HASH_WORKERS" not in os.environ:
+        os.environ["HASH_WORKERS"] = str(max(1, (os.cpu_count() or 1) // workers))
+
+
+def _split_db_pool(workers: int):
+    # likewise every worker opens (and warms) its own pool on the primary
+    # and on each replica: share DB_POOL_TOTAL out instead of opening
+    # workers x DB_POOL_SIZE connections. DB_POOL_WARM_SIZE is capped at
+    # the pool size, so it follows.
+    if "DB_POOL_SIZE" in os.environ:
+        return
+    total = DB_POOL_TOTAL or workers * DB_POOL_MIN_PER_WORKER
+    size = max(DB_POOL_MIN_PER_WORKER, total // workers)
+    if size * workers > total:
+        # one connection per worker is starved by a single export stream
+        logger.warning(
+            "DB_POOL_TOTAL=%d is too small for %d workers: opening %d per worker (%d in all)",
+            total, workers, size, size * workers
+        )
+    os.environ["DB_POOL_SIZE"] = str(size)
+
+
+# -------------------------------
+# SERVERS
+# -------------------------------
+def run_uvicorn(args):
+    import uvicorn
+
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=LOOP,
+        http=HTTP,
+        lifespan="on",
+        backlog=BACKLOG,
+        timeout_keep_alive=KEEPALIVE,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        access_log=ACCESS_LOG,
+    )
+
+
+def run_gunicorn(args):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit("SERVER=gunicorn needs the 'gunicorn' package")
+
+    # the worker class moved out of uvicorn into its own package
+    worker_class = (
+        "uvicorn_worker.UvicornWorker" if _installed("uvicorn_worker") else "uvicorn.workers.UvicornWorker"
+    )
+    options = {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": worker_class,
+        "backlog": BACKLOG,
+        "keepalive": KEEPALIVE,
+        "graceful_timeout": GRACEFUL_TIMEOUT,
+        "forwarded_allow_ips": FORWARDED_ALLOW_IPS,
+        "accesslog": "-" if ACCESS_LOG else None,
+    }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # imported in each worker: the app's process pools must not be forked
+            from backend.main import app
+            return app
+
+    Application().run()
+
+
+SERVERS = {"uvicorn": run_uvicorn, "gunicorn": run_gunicorn}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API")
+    parser.add_argument("--server", choices=sorted(SERVERS), default=SERVER)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    _split_hash_workers(args.workers)
+    _split_db_pool(args.workers)
+    logger.info(
+        "%s on %s:%d: %d workers, loop=%s http=%s keepalive=%ds backlog=%d hash_workers=%s db_pool_size=%s",
+        args.server, args.host, args.port, args.workers, LOOP, HTTP,
+        KEEPALIVE, BACKLOG, os.environ["HASH_WORKERS"], os.environ["DB_POOL_SIZE"]
+    )
+    SERVERS[args.server](args)
+
+
+if __name__ == "__main__":
+    main()
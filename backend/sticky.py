@@ -0,0 +1,108 @@
+import logging
+import os
+
+from .backends import BackendSlot, close_redis, connect_redis
+from .cache import TTLCache
+
+logger = logging.getLogger("backend.sticky")
+
+# -------------------------------
+# STICKY READ CONFIG
+# -------------------------------
+DB_STICKY_BACKEND = os.getenv("DB_STICKY_BACKEND", "memory")      # memory | redis
+DB_STICKY_REDIS_URL = os.getenv("DB_STICKY_REDIS_URL", "redis://localhost:6379/0")
+DB_STICKY_MAX_KEYS = int(os.getenv("DB_STICKY_MAX_KEYS", "100000"))   # memory backend only
+
+_stats = {
+    "pins": 0,
+    "pinned_reads": 0,
+    "errors": 0,
+}
+
+
+# -------------------------------
+# BACKENDS
+# -------------------------------
+class MemoryBackend:
+    """
+    Pins in this worker's memory, least recently used dropped first.
+
+    With several workers a client whose read lands on another worker than
+    its write is not pinned there; use the redis backend to share them.
+    """
+
+    def __init__(self, max_keys: int = DB_STICKY_MAX_KEYS):
+        self._pins = TTLCache(max_keys, float("inf"))
+
+    async def pin(self, key: str, seconds: float):
+        self._pins.set(key, True, ttl=seconds)
+
+    async def pinned(self, key: str) -> bool:
+        return self._pins.get(key) is not None
+
+    async def close(self):
+        pass
+
+
+class RedisBackend:
+    """Pins shared by every worker, one expiring redis key each."""
+
+    def __init__(self, url: str = DB_STICKY_REDIS_URL):
+        self._redis = connect_redis(url, "DB_STICKY_BACKEND")
+
+    async def pin(self, key: str, seconds: float):
+        await self._redis.set(f"sticky:{key}", 1, px=max(1, int(seconds * 1000)))
+
+    async def pinned(self, key: str) -> bool:
+        return bool(await self._redis.exists(f"sticky:{key}"))
+
+    async def close(self):
+        await close_redis(self._redis)
+
+
+_slot = BackendSlot("DB_STICKY_BACKEND", DB_STICKY_BACKEND, {"memory": MemoryBackend, "redis": RedisBackend})
+
+
+def get_backend():
+    return _slot.get()
+
+
+def set_backend(backend):
+    """Plug in any object with async pin(key, seconds), pinned(key) and close()."""
+    _slot.set(backend)
+
+
+async def close_backend():
+    await _slot.close()
+
+
+# -------------------------------
+# PINS
+# -------------------------------
+async def pin(key: str, seconds: float):
+    """Send key's reads to the primary for the next seconds."""
+    try:
+        await get_backend().pin(key, seconds)
+    except Exception:
+        # the client may read a lagging replica, nothing worse
+        _stats["errors"] += 1
+        logger.exception("sticky read backend failed to pin")
+        return
+    _stats["pins"] += 1
+
+
+async def pinned(key: str) -> bool:
+    try:
+        hit = await get_backend().pinned(key)
+    except Exception:
+        # unsure: the primary is always up to date
+        _stats["errors"] += 1
+        logger.exception("sticky read backend failed to look up a pin")
+        return True
+    if hit:
+        _stats["pinned_reads"] += 1
+    return hit
+
+
+def sticky_stats():
+    return dict(_stats)
@@ -0,0 +1,82 @@
+"""
+Users/second for POST /users/bulk against looping POST /users.
+
+    python -m bench.bulk_bench --users 200
+    BCRYPT_ROUNDS=4 python -m bench.bulk_bench --users 2000
+
+Bulk requests carry at most MAX_BULK_PASSWORDS users each, so larger runs
+send several. bcrypt dominates both paths at the default cost, so the
+bulk speedup is roughly BULK_HASH_SLOTS; lowering BCRYPT_ROUNDS shows the
+per-request overhead the bulk path removes.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from backend.routes.bulk_routes import MAX_BULK_PASSWORDS
+from bench.fake_db import install
+
+
+def _users(prefix: str, n: int):
+    return [
+        {"name": f"{prefix}{i}", "email": f"{prefix}{i}@example.com", "password": f"pw-{i}"}
+        for i in range(n)
+    ]
+
+
+async def _run(app, token, n):
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        started = time.perf_counter()
+        for user in _users("loop", n):
+            resp = await client.post("/users", json=user, headers=headers)
+            resp.raise_for_status()
+        loop_seconds = time.perf_counter() - started
+
+        users = _users("bulk", n)
+        started = time.perf_counter()
+        for i in range(0, n, MAX_BULK_PASSWORDS):
+            resp = await client.post("/users/bulk", json={"users": users[i:i + MAX_BULK_PASSWORDS]}, headers=headers)
+            resp.raise_for_status()
+            assert resp.json()["failed"] == 0, resp.json()["results"]
+        bulk_seconds = time.perf_counter() - started
+
+    return loop_seconds, bulk_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    from backend.hashing import BCRYPT_ROUNDS, BULK_HASH_SLOTS, HASH_WORKERS, shutdown_executor, start_executor
+    from backend.main import app
+    from backend.routes.auth_routes import create_access_token
+
+    pool = install()
+    pool.seed(1, "x" * 60)
+    token = create_access_token({"sub": "1"})
+
+    start_executor()
+    try:
+        loop_seconds, bulk_seconds = asyncio.run(_run(app, token, args.users))
+    finally:
+        shutdown_executor()
+
+    print(json.dumps({
+        "users": args.users,
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+        "hash_workers": HASH_WORKERS,
+        "bulk_hash_slots": BULK_HASH_SLOTS,
+        "loop_users_per_second": round(args.users / loop_seconds, 1),
+        "bulk_users_per_second": round(args.users / bulk_seconds, 1),
+        "speedup": round(loop_seconds / bulk_seconds, 1),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Peak memory and throughput of GET /users/export against the old
+fetch-everything approach.
+
+Run each mode in its own process so peak RSS is not shared:
+
+    python -m bench.export_bench --rows 1000000 --mode stream
+    python -m bench.export_bench --rows 1000000 --mode stream --gzip
+    python -m bench.export_bench --rows 1000000 --mode fetchall
+"""
+import argparse
+import asyncio
+import json
+import resource
+import time
+
+from bench.fake_db import install
+from backend import db
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def _run_stream(app, token, fmt, gzip):
+    # drive the ASGI app directly: httpx's ASGITransport buffers the whole body
+    query = f"format={fmt}&gzip={str(gzip).lower()}"
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/users/export",
+        "raw_path": b"/users/export",
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    total = 0
+    status = None
+    sent_request = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal sent_request
+        if not sent_request:
+            sent_request = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal total, status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            total += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    finished.set()
+    if status != 200:
+        raise RuntimeError(f"export returned {status}")
+    return total
+
+
+async def _run_fetchall():
+    # what /db-users used to do: every row as a dict, one json document
+    async with db.connection() as conn:
+        users = await conn.fetchall("SELECT id, name, email FROM mock_data")
+    body = json.dumps({"count": len(users), "data": users}).encode()
+    return len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--mode", choices=["stream", "fetchall"], default="stream")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    args = parser.parse_args()
+
+    from backend.main import app
+    from backend.routes.auth_routes import create_access_token
+    token = create_access_token({"sub": "1"})
+
+    pool = install()
+    pool.seed(args.rows, "x" * 60)
+    baseline_mb = _peak_rss_mb()
+
+    started = time.perf_counter()
+    if args.mode == "stream":
+        size = asyncio.run(_run_stream(app, token, args.format, args.gzip))
+    else:
+        size = asyncio.run(_run_fetchall())
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps({
+        "mode": args.mode,
+        "format": args.format if args.mode == "stream" else "json",
+        "gzip": args.gzip,
+        "rows": args.rows,
+        "bytes": size,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(args.rows / elapsed),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "peak_rss_over_seed_mb": round(_peak_rss_mb() - baseline_mb, 1),
+    }))
+
+
+if __name__ == "__main__":
+    main()
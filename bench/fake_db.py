@@ -0,0 +1,158 @@
+"""
+In-process stand-in for the MySQL pool, backed by sqlite3.
+
+install() swaps it in for backend.db's pool so the app can be driven
+without a database server. It implements the same connection methods as
+backend.db.SyncConnection / AsyncConnection.
+
+install(replicas=N) also registers N replicas reading the same data; set
+a replica pool's `down` to make it refuse connections and fail queries,
+to exercise read routing and failover.
+"""
+import re
+import sqlite3
+
+from backend import db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mock_data (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_mock_data_name ON mock_data (name);
+CREATE TABLE IF NOT EXISTS token_revocations (
+    user_id INTEGER PRIMARY KEY,
+    revoked_before_ms INTEGER NOT NULL DEFAULT 0,
+    stale_before_ms INTEGER NOT NULL DEFAULT 0,
+    updated_ms INTEGER NOT NULL
+);
+"""
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+        self.raw = pool.raw
+
+    @staticmethod
+    def _sql(sql):
+        # the MySQL upsert spelling, in sqlite's words
+        sql = re.sub(r"ON DUPLICATE KEY UPDATE", "ON CONFLICT DO UPDATE SET", sql)
+        sql = re.sub(r"VALUES\((\w+)\)", r"excluded.\1", sql)
+        sql = sql.replace("GREATEST(", "MAX(")
+        return sql.replace("%s", "?")
+
+    def _check(self):
+        if self.pool.down:
+            raise db.ConnectionLost()
+
+    async def fetchone(self, sql, args=None, dictionary=True):
+        self._check()
+        row = self.raw.execute(self._sql(sql), args or ()).fetchone()
+        if row is None:
+            return None
+        return dict(row) if dictionary else tuple(row)
+
+    async def fetchall(self, sql, args=None, dictionary=True):
+        self._check()
+        rows = self.raw.execute(self._sql(sql), args or ()).fetchall()
+        return [dict(row) if dictionary else tuple(row) for row in rows]
+
+    async def execute(self, sql, args=None):
+        self.pool.last_insert_id = None
+        try:
+            cur = self.raw.execute(self._sql(sql), args or ())
+        except sqlite3.IntegrityError as e:
+            raise db.IntegrityError(str(e)) from e
+        # like MySQL, LAST_INSERT_ID(expr) in an UPDATE sets the reported id
+        lastrowid = cur.lastrowid if self.pool.last_insert_id is None else self.pool.last_insert_id
+        return db.Result(cur.rowcount, lastrowid)
+
+    async def stream(self, sql, args=None, batch_size=1000):
+        cur = self.raw.execute(self._sql(sql), args or ())
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [tuple(row) for row in rows]
+
+    async def executemany(self, sql, seq_args):
+        try:
+            cur = self.raw.executemany(self._sql(sql), seq_args)
+        except sqlite3.IntegrityError as e:
+            raise db.IntegrityError(str(e)) from e
+        return db.Result(cur.rowcount, cur.lastrowid)
+
+    async def begin(self):
+        self.raw.execute("BEGIN")
+
+    async def commit(self):
+        if self.raw.in_transaction:
+            self.raw.commit()
+
+    async def rollback(self):
+        if self.raw.in_transaction:
+            self.raw.rollback()
+
+
+class FakePool:
+    def __init__(self, path: str = ":memory:", raw=None):
+        self.down = False
+        self.checkouts = 0
+        self.last_insert_id = None
+        if raw is not None:
+            # a replica: same database as its primary, so no lag
+            self.raw = raw
+            return
+
+        # autocommit, like the real pools
+        self.raw = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.raw.row_factory = sqlite3.Row
+        self.raw.executescript(SCHEMA)
+        self.raw.create_function("LAST_INSERT_ID", 1, self._last_insert_id)
+
+    def _last_insert_id(self, value):
+        self.last_insert_id = value
+        return value
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def acquire(self):
+        if self.down:
+            raise db.PoolUnavailable()
+        self.checkouts += 1
+        db._record_checkout(0.0)
+        return FakeConnection(self)
+
+    async def release(self, conn):
+        db._record_checkin()
+
+    def seed(self, n: int, password_hash: str, batch_size: int = 10000):
+        """Insert users user0@example.com .. user{n-1}@example.com."""
+        start = self.raw.execute("SELECT COALESCE(MAX(id), 0) FROM mock_data").fetchone()[0]
+        self.raw.execute("BEGIN")
+        for lo in range(0, n, batch_size):
+            self.raw.executemany(
+                "INSERT INTO mock_data (name, email, password) VALUES (?, ?, ?)",
+                [
+                    (f"user{i}", f"user{i}@example.com", password_hash)
+                    for i in range(start + lo, start + min(lo + batch_size, n))
+                ]
+            )
+        self.raw.commit()
+
+
+def install(path: str = ":memory:", replicas: int = 0) -> FakePool:
+    pool = FakePool(path)
+    db._pool = pool
+    db._replicas[:] = [
+        db.Replica(f"fake{i}", FakePool(raw=pool.raw)) for i in range(replicas)
+    ]
+    return pool
@@ -0,0 +1,74 @@
+"""
+List-response cost: dict rows + jsonable_encoder + stdlib json (before)
+against tuple rows + orjson (FastJSONResponse, after).
+
+    python -m bench.json_bench --rows 10000 100000
+
+Rows are read from bench.fake_db, so the fetch side includes building
+the row objects the same way the handlers do.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.responses import FastJSONResponse, orjson
+from bench.fake_db import install
+
+FIELDS = ["id", "name", "email"]
+SQL = "SELECT id, name, email FROM mock_data ORDER BY id LIMIT %s"
+
+
+async def _before(conn, n):
+    users = await conn.fetchall(SQL, (n,))
+    return JSONResponse(jsonable_encoder({"count": len(users), "data": users})).body
+
+
+async def _after(conn, n):
+    rows = await conn.fetchall(SQL, (n,), dictionary=False)
+    users = [dict(zip(FIELDS, row)) for row in rows]
+    return FastJSONResponse({"count": len(users), "data": users}).body
+
+
+def _time(loop, fn, conn, n, repeat):
+    body = loop.run_until_complete(fn(conn, n))
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        loop.run_until_complete(fn(conn, n))
+        best = min(best, time.perf_counter() - started)
+    return best, body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pool = install()
+    pool.seed(max(args.rows), "x" * 60)
+    loop = asyncio.new_event_loop()
+    conn = loop.run_until_complete(pool.acquire())
+
+    results = []
+    for n in args.rows:
+        before, old_body = _time(loop, _before, conn, n, args.repeat)
+        after, new_body = _time(loop, _after, conn, n, args.repeat)
+        assert json.loads(old_body) == json.loads(new_body)
+        results.append({
+            "rows": n,
+            "before_ms": round(before * 1000, 1),
+            "after_ms": round(after * 1000, 1),
+            "speedup": round(before / after, 2),
+            "orjson": orjson is not None,
+        })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Load test for the auth and user endpoints.
+
+By default the app runs in-process on top of bench.fake_db (sqlite), so
+no MySQL server is needed; pass --url to drive a running server instead
+(its database must already contain the seeded users, see --seed-only).
+
+    python -m bench.loadtest --users 1000 --requests 500 --concurrency 50
+    python -m bench.loadtest --save-baseline bench/baseline.json
+    python -m bench.loadtest --baseline bench/baseline.json   # exit 1 on regression
+    python -m bench.loadtest --replicas 2    # reads routed to two fake replicas
+
+BCRYPT_ROUNDS and HASH_WORKERS are read from the environment as usual;
+lower rounds keep register/login/create/put scenarios short. Every request
+comes from one client, so the in-process app runs with RATE_LIMIT_ENABLED=0
+unless it is set; start a --url server with it too.
+
+In-process, the sqlite fake never yields to the event loop, so requests
+that do not hash a password run one after another: latency there is the
+app's own CPU cost per request, which is what regressions in get_db
+(get_conn), the routers or the auth helpers show up in. Use --url for
+real concurrency.
+
+Output is one JSON document: per scenario requests, errors, rps and
+p50/p95/p99 latency in milliseconds.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+
+import httpx
+
+SEED_PASSWORD = "bench-password"
+SCENARIOS = ("register", "login", "get_users", "db_users", "create", "put", "patch", "delete")
+
+
+# -------------------------------
+# SCENARIOS
+# -------------------------------
+class Scenarios:
+    """One request per call; ids and emails come from counters so writes never collide."""
+
+    def __init__(self, seeded: int):
+        self.seeded = seeded
+        self._serial = itertools.count()
+        self._read_ids = itertools.cycle(range(2, seeded + 1))
+        self._delete_ids = itertools.count(seeded, -1)
+
+    def _email(self, prefix):
+        return f"{prefix}{next(self._serial)}-{time.time_ns()}@example.com"
+
+    async def register(self, client, headers):
+        return await client.post("/register", json={
+            "name": "bench", "email": self._email("reg"), "password": SEED_PASSWORD
+        })
+
+    async def login(self, client, headers):
+        user_id = next(self._read_ids)
+        return await client.post("/login", data={
+            "username": f"user{user_id - 1}@example.com", "password": SEED_PASSWORD
+        })
+
+    async def get_users(self, client, headers):
+        return await client.get("/users", params={"limit": 100}, headers=headers)
+
+    async def db_users(self, client, headers):
+        return await client.get("/db-users", params={"limit": 100}, headers=headers)
+
+    async def create(self, client, headers):
+        return await client.post("/users", headers=headers, json={
+            "name": "bench", "email": self._email("new"), "password": SEED_PASSWORD
+        })
+
+    async def put(self, client, headers):
+        user_id = next(self._read_ids)
+        return await client.put(f"/users/{user_id}", headers=headers, json={
+            "name": f"user{user_id - 1}", "email": f"user{user_id - 1}@example.com", "password": SEED_PASSWORD
+        })
+
+    async def patch(self, client, headers):
+        user_id = next(self._read_ids)
+        return await client.patch(f"/users/{user_id}", headers=headers, json={"name": f"patched{user_id}"})
+
+    async def delete(self, client, headers):
+        # from the top of the seeded range down, never the token's own user (id 1)
+        user_id = next(self._delete_ids)
+        return await client.delete(f"/users/{max(user_id, 2)}", headers=headers)
+
+
+# -------------------------------
+# RUNNER
+# -------------------------------
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+async def _run_scenario(client, headers, call, requests, concurrency):
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                resp = await call(client, headers)
+                ok = resp.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def run(args, app=None):
+    if app is not None:
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None)
+    else:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        client = httpx.AsyncClient(base_url=args.url, timeout=None, limits=limits)
+
+    async with client:
+        resp = await client.post("/login", data={"username": "user0@example.com", "password": SEED_PASSWORD})
+        resp.raise_for_status()
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+        scenarios = Scenarios(args.users)
+        results = {}
+        for name in args.scenarios:
+            results[name] = await _run_scenario(
+                client, headers, getattr(scenarios, name), args.requests, args.concurrency
+            )
+    return results
+
+
+# -------------------------------
+# BASELINES
+# -------------------------------
+def compare(results, baseline, tolerance):
+    """Scenarios whose rps fell or p99 rose by more than tolerance (a fraction)."""
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        if current["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {before['rps']} -> {current['rps']}")
+        if current["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {before['p99_ms']}ms -> {current['p99_ms']}ms")
+        if current["errors"] > before["errors"]:
+            regressions.append(f"{name}: errors {before['errors']} -> {current['errors']}")
+    return regressions
+
+
+def _seed_in_process(n, replicas=0):
+    from backend.hashing import pwd_context
+    from bench.fake_db import install
+
+    pool = install(replicas=replicas)
+    pool.seed(n, pwd_context.hash(SEED_PASSWORD))
+    return pool
+
+
+async def _run_in_process(args, app):
+    # the lifespan warms what a server would (hashing processes, email
+    # index, revocation list), so requests take the same paths they do there
+    async with app.router.lifespan_context(app):
+        return await run(args, app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--users", type=int, default=1000, help="users to seed")
+    parser.add_argument("--replicas", type=int, default=0, help="in-process only: fake read replicas")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--baseline", help="compare against this saved result")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed regression (fraction)")
+    parser.add_argument("--save-baseline", help="write the result here")
+    parser.add_argument("--seed-only", action="store_true", help="print seed SQL for --url runs and exit")
+    args = parser.parse_args()
+
+    if args.seed_only:
+        from backend.hashing import pwd_context
+        hashed = pwd_context.hash(SEED_PASSWORD)
+        for i in range(args.users):
+            print(f"INSERT INTO mock_data (name, email, password) VALUES ('user{i}', 'user{i}@example.com', '{hashed}');")
+        return
+
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+    started = time.perf_counter()
+    if args.url:
+        results = asyncio.run(run(args))
+    else:
+        from backend.main import app
+
+        _seed_in_process(args.users, args.replicas)
+        results = asyncio.run(_run_in_process(args, app))
+
+    report = {
+        "target": args.url or "in-process",
+        "users": args.users,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "seconds": round(time.perf_counter() - started, 2),
+        "scenarios": results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+
+    print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Micro-benchmarks for the auth helpers.
+
+    python -m bench.micro
+    python -m bench.micro --json > micro.json
+
+Times create_access_token, get_current_user and bcrypt hashing and
+verification at the configured BCRYPT_ROUNDS.
+
+get_current_user is timed with warm and cold caches for two kinds of
+token, against bench.fake_db:
+- legacy: carries only "sub", so a cold cache means a user lookup in the DB
+- claims: carries name/email and is checked against the revocation list
+Pass --db-latency-ms to add a simulated MySQL round trip to every query.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+
+def _bench(fn, number):
+    fn()  # warm up
+    started = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - started) / number
+
+
+def _bench_async(loop, coro_fn, number):
+    async def batch():
+        await coro_fn()
+        started = time.perf_counter()
+        for _ in range(number):
+            await coro_fn()
+        return (time.perf_counter() - started) / number
+
+    return loop.run_until_complete(batch())
+
+
+class _CountingConnection:
+    """Wraps a connection to count queries and add a fixed round-trip time."""
+
+    def __init__(self, conn, latency: float):
+        self.conn = conn
+        self.latency = latency
+        self.queries = 0
+
+    async def fetchone(self, sql, args=None, dictionary=True):
+        self.queries += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await self.conn.fetchone(sql, args, dictionary)
+
+
+def run(number: int, db_latency_ms: float = 0.0) -> dict:
+    from backend import db
+    from backend.cache import token_cache, user_cache
+    from backend.hashing import BCRYPT_ROUNDS, pwd_context
+    from backend.revocations import revocations
+    from backend.routes.auth_routes import create_access_token, get_current_user
+    from bench.fake_db import install
+
+    pool = install()
+    pool.seed(1, "x" * 60)
+    legacy_token = create_access_token({"sub": "1"})
+    claims_token = create_access_token({"sub": "1", "name": "user0", "email": "user0@example.com"})
+    hashed = pwd_context.hash("bench-password")
+
+    loop = asyncio.new_event_loop()
+    conn = _CountingConnection(loop.run_until_complete(pool.acquire()), db_latency_ms / 1000)
+    loop.run_until_complete(revocations.refresh())
+
+    def auth(token, cold):
+        async def call():
+            if cold:
+                token_cache.clear()
+                user_cache.clear()
+            await get_current_user(token, conn)
+        return call
+
+    def queries_per_call(token):
+        conn.queries = 0
+        loop.run_until_complete(auth(token, True)())
+        return conn.queries
+
+    results = {
+        "create_access_token_us": _bench(lambda: create_access_token({"sub": "1"}), number) * 1e6,
+        "get_current_user_cached_us": _bench_async(loop, auth(legacy_token, False), number) * 1e6,
+        "get_current_user_uncached_us": _bench_async(loop, auth(legacy_token, True), number) * 1e6,
+        "get_current_user_claims_cached_us": _bench_async(loop, auth(claims_token, False), number) * 1e6,
+        "get_current_user_claims_uncached_us": _bench_async(loop, auth(claims_token, True), number) * 1e6,
+        "db_queries_per_auth_legacy": queries_per_call(legacy_token),
+        "db_queries_per_auth_claims": queries_per_call(claims_token),
+        "db_latency_ms": db_latency_ms,
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+        "password_hash_ms": _bench(lambda: pwd_context.hash("bench-password"), 5) * 1e3,
+        "password_verify_ms": _bench(lambda: pwd_context.verify("bench-password", hashed), 5) * 1e3,
+    }
+    loop.close()
+    db._pool = None
+    return {k: round(v, 2) if isinstance(v, float) else v for k, v in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=5000)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="simulated MySQL round trip")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = run(args.number, args.db_latency_ms)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for key, value in results.items():
+            print(f"{key:38} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Worker startup cost: how long before a fresh worker can take traffic.
+
+    python -m bench.startup
+    python -m bench.startup --runs 10 --rows 100000 --json
+
+Each run starts a new interpreter, imports backend.main and runs the app's
+lifespan up to its yield against bench.fake_db, then reports the times the
+app itself records (backend_lifecycle in /metrics):
+- import_seconds: importing the backend package and its dependencies
+- startup_seconds: lifespan warm-up (pools, hashing processes, caches)
+
+It also runs `python -X importtime` once and lists the imports that cost
+the most, to see what a slimmer worker would have to drop.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# runs in a clean interpreter, so nothing is imported yet
+CHILD = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+from backend.main import app
+from backend.metrics import lifecycle
+from bench.fake_db import install
+
+pool = install()
+pool.seed({rows}, "x" * 60)
+
+async def run():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter() - started
+    return ready
+
+ready = asyncio.run(run())
+print(json.dumps({{
+    "import_seconds": lifecycle["import_seconds"],
+    "startup_seconds": lifecycle["startup_seconds"],
+    "ready_seconds": ready,
+}}))
+"""
+
+
+def _child_env():
+    env = dict(os.environ)
+    env.setdefault("RATE_LIMIT_ENABLED", "0")
+    env.setdefault("STARTUP_WARM_TIMEOUT", "60")    # time the whole warm-up, not the cut-off
+    return env
+
+
+def time_to_ready(rows: int) -> dict:
+    """One cold start in a new interpreter; seconds spent in each phase."""
+    started = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD.format(rows=rows)],
+        capture_output=True, text=True, check=True, env=_child_env()
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process_seconds"] = time.perf_counter() - started
+    return result
+
+
+def import_profile(top: int) -> list:
+    """The `top` modules with the largest cumulative import time (ms)."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        capture_output=True, text=True, check=True, env=_child_env()
+    )
+    modules = {}
+    for line in out.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        # only top-level packages, or their cost is counted several times
+        if "." not in name:
+            modules[name] = max(modules.get(name, 0), int(cumulative))
+    ranked = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"module": name, "ms": round(us / 1000, 1)} for name, us in ranked]
+
+
+def run(runs: int, rows: int, top: int) -> dict:
+    samples = [time_to_ready(rows) for _ in range(runs)]
+    results = {
+        key: round(statistics.median(s[key] for s in samples) * 1000, 1)
+        for key in ("import_seconds", "startup_seconds", "ready_seconds", "process_seconds")
+    }
+    results = {key.replace("_seconds", "_ms"): value for key, value in results.items()}
+    results.update({"runs": runs, "rows": rows, "imports": import_profile(top)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=10000, help="users seeded for the email index warm-up")
+    parser.add_argument("--top", type=int, default=10, help="heaviest imports to list")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = run(args.runs, args.rows, args.top)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for key, value in results.items():
+        if key != "imports":
+            print(f"{key:20} {value}")
+    print("heaviest imports (cumulative ms):")
+    for entry in results["imports"]:
+        print(f"  {entry['module']:30} {entry['ms']}")
+
+
+if __name__ == "__main__":
+    main()
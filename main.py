@@ -1 +1,5 @@
 from backend.main import app
+
+if __name__ == "__main__":
+    from backend.serve import main
+    main()
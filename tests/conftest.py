@@ -0,0 +1,56 @@
+"""
+Fixtures for driving the app in-process on bench.fake_db.
+
+The environment is set before backend is imported: cheap bcrypt on the
+threadpool and no rate limits, as in the bench scripts.
+"""
+import os
+
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("HASH_WORKERS", "0")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+import pytest  # noqa: E402
+
+PASSWORD = "test-password"
+SEEDED = 25
+
+
+@pytest.fixture
+def fake_db():
+    """A fresh sqlite-backed pool with SEEDED users, and empty caches."""
+    from backend.cache import count_cache, token_cache, user_cache
+    from backend.hashing import pwd_context
+    from backend.revocations import revocations
+    from bench.fake_db import install
+
+    for cache in (user_cache, token_cache, count_cache):
+        cache.clear()
+    with revocations._lock:
+        revocations._entries.clear()
+
+    pool = install()
+    pool.seed(SEEDED, pwd_context.hash(PASSWORD))
+    return pool
+
+
+@pytest.fixture
+def client(fake_db):
+    """A TestClient inside the app's lifespan, so the revocation list is warm."""
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def login(client):
+    """login(n) -> Authorization headers for user{n}@example.com."""
+    def login(n: int = 0):
+        response = client.post("/login", data={"username": f"user{n}@example.com", "password": PASSWORD})
+        assert response.status_code == 200
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return login
@@ -0,0 +1,120 @@
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from backend.cache import user_cache
+from backend.main import app
+from backend.routes import auth_routes
+
+
+def _user_lookups():
+    stats = user_cache.stats()
+    return stats["hits"] + stats["misses"]
+
+
+def _legacy_token(user_id: int, secret: str = auth_routes.SECRET_KEY) -> str:
+    """A token from before key ids: no kid header, no name/email claims."""
+    claims = {"sub": str(user_id), "exp": datetime.utcnow() + timedelta(minutes=5), "iat": time.time()}
+    return jwt.encode(claims, secret, algorithm=auth_routes.ALGORITHM)
+
+
+def test_valid_token_skips_user_lookup(client, login):
+    headers = login(0)
+    lookups = _user_lookups()
+
+    response = client.get("/db-users", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["logged_in_user"] == {"id": 1, "name": "user0", "email": "user0@example.com"}
+    assert _user_lookups() == lookups
+
+
+def test_password_change_revokes_tokens(client, login):
+    admin, victim = login(0), login(1)
+
+    response = client.patch("/users/2", headers=admin, json={"password": "new-password"})
+    assert response.status_code == 200
+
+    response = client.get("/users", headers=victim)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token revoked"
+
+    # a token issued after the change works
+    response = client.post("/login", data={"username": "user1@example.com", "password": "new-password"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/users", headers=headers).status_code == 200
+
+
+def test_delete_revokes_tokens(client, login):
+    admin, victim = login(0), login(1)
+
+    assert client.delete("/users/2", headers=admin).status_code == 200
+    assert client.get("/users", headers=victim).status_code == 401
+
+
+def test_name_change_makes_token_stale(client, login):
+    admin, renamed = login(0), login(1)
+
+    assert client.patch("/users/2", headers=admin, json={"name": "renamed"}).status_code == 200
+    lookups = _user_lookups()
+
+    response = client.get("/db-users", headers=renamed)
+
+    # still accepted, but the user comes from the DB rather than the claims
+    assert response.status_code == 200
+    assert response.json()["logged_in_user"]["name"] == "renamed"
+    assert _user_lookups() > lookups
+
+
+def test_revocation_rolls_back_with_the_write(client, login, fake_db):
+    admin = login(0)
+    fake_db.raw.execute("DROP TABLE token_revocations")
+
+    # no lifespan: it shares the running one's pools
+    answers_500 = TestClient(app, raise_server_exceptions=False)
+    response = answers_500.patch("/users/2", headers=admin, json={"name": "lost", "password": "new-password"})
+
+    assert response.status_code == 500
+    row = fake_db.raw.execute("SELECT name, version FROM mock_data WHERE id=2").fetchone()
+    assert tuple(row) == ("user1", 1)
+
+
+def test_token_without_kid_is_verified_with_the_legacy_key(client):
+    response = client.get("/users", headers={"Authorization": f"Bearer {_legacy_token(1)}"})
+
+    assert response.status_code == 200
+
+
+def test_token_without_kid_rejected_once_keys_rotate(client, monkeypatch):
+    monkeypatch.setattr(auth_routes, "JWT_KEYS", {"k2": "rotated-secret"})
+    monkeypatch.setattr(auth_routes, "SIGNING_KID", "k2")
+    monkeypatch.setattr(auth_routes, "JWT_LEGACY_KEY", None)
+
+    response = client.get("/users", headers={"Authorization": f"Bearer {_legacy_token(1)}"})
+
+    assert response.status_code == 401
+    assert "key id" in response.json()["detail"]
+
+
+def test_token_without_kid_accepted_with_legacy_key_set(client, monkeypatch):
+    monkeypatch.setattr(auth_routes, "JWT_KEYS", {"k2": "rotated-secret"})
+    monkeypatch.setattr(auth_routes, "SIGNING_KID", "k2")
+    monkeypatch.setattr(auth_routes, "JWT_LEGACY_KEY", "old-secret")
+
+    ok = _legacy_token(1, "old-secret")
+    forged = _legacy_token(1, auth_routes.SECRET_KEY)
+
+    assert client.get("/users", headers={"Authorization": f"Bearer {ok}"}).status_code == 200
+    assert client.get("/users", headers={"Authorization": f"Bearer {forged}"}).status_code == 401
+
+
+def test_non_string_kid_is_401(client):
+    claims = {"sub": "1", "exp": datetime.utcnow() + timedelta(minutes=5)}
+    for kid in ([], {"a": 1}, 7):
+        token = jwt.encode(claims, auth_routes.SECRET_KEY, algorithm=auth_routes.ALGORITHM, headers={"kid": kid})
+
+        response = client.get("/users", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 401
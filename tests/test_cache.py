@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+import pytest
+from jose import jwt
+
+from backend import cache
+from backend.cache import TTLCache, user_cache
+from backend.routes import auth_routes
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+# -------------------------------
+# TTL CACHE
+# -------------------------------
+def test_entries_expire(clock):
+    c = TTLCache(10, ttl=5)
+    c.set("a", 1)
+    c.set("b", 2, ttl=1)
+    c.set("c", 3, ttl=60)      # capped at the cache's ttl
+
+    clock.now += 1
+    assert c.get("b") is None
+    assert c.get("a") == 1
+
+    clock.now += 4
+    assert c.get("a") is None and c.get("c") is None
+    assert c.stats()["size"] == 0
+
+
+def test_least_recently_used_evicted_first(clock):
+    c = TTLCache(2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")
+    c.set("c", 3)
+
+    assert (c.get("a"), c.get("b"), c.get("c")) == (1, None, 3)
+    assert c.stats()["evictions"] == 1
+
+
+def test_hit_and_miss_counters(clock):
+    c = TTLCache(10, ttl=60)
+    c.set("a", 1)
+
+    c.get("a")
+    c.get("a")
+    c.get("missing")
+    c.pop("a")
+    c.get("a")
+
+    stats = c.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_nothing_stored_without_room_or_time(clock):
+    assert TTLCache(0, ttl=60).set("a", 1) is None
+    c = TTLCache(10, ttl=60)
+    c.set("a", 1, ttl=0)
+
+    assert c.get("a") is None and c.stats()["size"] == 0
+
+
+# -------------------------------
+# INVALIDATION
+# -------------------------------
+def _cache_user_2(client):
+    # a token without name/email claims: the user comes from the DB, through the cache
+    claims = {"sub": "2", "exp": datetime.utcnow() + timedelta(minutes=5)}
+    token = jwt.encode(claims, auth_routes.SECRET_KEY, algorithm=auth_routes.ALGORITHM)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/db-users", headers=headers).status_code == 200
+    assert user_cache.get(2) is not None
+
+
+@pytest.mark.parametrize("write", [
+    lambda client, headers: client.patch("/users/2", headers=headers, json={"name": "changed"}),
+    lambda client, headers: client.put(
+        "/users/2", headers=headers, json={"name": "n", "email": "n@example.com", "password": "pw"}
+    ),
+    lambda client, headers: client.delete("/users/2", headers=headers),
+    lambda client, headers: client.patch("/users/bulk", headers=headers, json={"users": [{"id": 2, "name": "x"}]}),
+    lambda client, headers: client.request("DELETE", "/users/bulk", headers=headers, json={"ids": [2]}),
+], ids=["patch", "put", "delete", "bulk_patch", "bulk_delete"])
+def test_writes_drop_the_cached_user(client, login, write):
+    headers = login(0)
+    _cache_user_2(client)
+
+    assert write(client, headers).status_code == 200
+    assert user_cache.get(2) is None
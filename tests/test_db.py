@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from backend import db
+
+
+class FlakyPool:
+    """Hands out connections until the nth acquire, which fails."""
+
+    def __init__(self, fail_at: int):
+        self.fail_at = fail_at
+        self.acquired = 0
+        self.in_use = 0
+
+    async def acquire(self):
+        self.acquired += 1
+        if self.acquired == self.fail_at:
+            raise db.PoolUnavailable()
+        self.in_use += 1
+        return object()
+
+    async def release(self, conn):
+        self.in_use -= 1
+
+
+def test_warm_releases_what_it_got_when_an_acquire_fails():
+    pool = FlakyPool(fail_at=2)
+
+    with pytest.raises(db.PoolUnavailable):
+        asyncio.run(db._warm(pool))
+
+    assert pool.acquired == min(db.POOL_WARM_SIZE, db.POOL_SIZE)
+    assert pool.in_use == 0
+
+
+class SlowOpenPool(FlakyPool):
+    """Takes a while to open, and counts how often it was."""
+
+    def __init__(self):
+        super().__init__(fail_at=0)
+        self.opens = 0
+
+    async def open(self):
+        self.opens += 1
+        await asyncio.sleep(0.01)
+
+
+def test_replica_opened_once_by_concurrent_first_reads():
+    replica = db.Replica("late", SlowOpenPool())
+
+    async def run():
+        return await asyncio.gather(*(replica.acquire() for _ in range(5)))
+
+    asyncio.run(run())
+
+    assert replica.pool.opens == 1
+    assert replica.opened and replica.in_use == 5
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from backend import email_index as email_index_module
+from backend.email_index import EmailIndex, email_taken
+
+
+class Conn:
+    """Counts the SELECTs email_taken sends; every email it is asked about exists."""
+
+    def __init__(self):
+        self.queries = 0
+
+    async def fetchone(self, sql, args=None, dictionary=True):
+        self.queries += 1
+        return (1,)
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = EmailIndex(1000, 0.01)
+    index.add("taken@example.com")
+    index.ready = True
+    monkeypatch.setattr(email_index_module, "email_index", index)
+    return index
+
+
+def test_bloom_miss_skips_the_select(index):
+    conn = Conn()
+
+    assert asyncio.run(email_taken(conn, "free@example.com")) is False
+    assert conn.queries == 0
+    assert index.stats()["definitely_free"] == 1
+
+
+def test_bloom_hit_asks_the_database(index):
+    conn = Conn()
+
+    # case-insensitive, like the column
+    assert asyncio.run(email_taken(conn, " Taken@Example.com")) is True
+    assert conn.queries == 1
+    assert index.stats()["unsure"] == 1
+
+
+def test_cold_index_asks_the_database(index):
+    index.ready = False
+    conn = Conn()
+
+    assert asyncio.run(email_taken(conn, "free@example.com")) is True
+    assert conn.queries == 1
+
+
+def test_register_duplicate_is_rejected_after_warm_up(client):
+    response = client.post("/register", json={"name": "x", "email": "user3@example.com", "password": "pw"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
@@ -0,0 +1,211 @@
+"""
+An export cut short by a client disconnect must give its connection back.
+
+StreamingResponse is driven the way uvicorn drives it (ASGI 2.3): the
+client disconnects while a batch is being fetched, and Starlette cancels
+the stream through its task group.
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi.responses import StreamingResponse
+
+from backend import db
+from backend.export import stream_users
+
+ROWS = [(i, f"user{i}") for i in range(1, 11)]
+
+
+# -------------------------------
+# FAKE DRIVERS
+# -------------------------------
+class SyncCursor:
+    def __init__(self):
+        self.rows = list(ROWS)
+        self.closed = False
+
+    def execute(self, sql, args=None):
+        pass
+
+    def fetchmany(self, n):
+        time.sleep(0.02)
+        batch, self.rows = self.rows[:n], self.rows[n:]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class SyncRaw:
+    """A mysql.connector pooled connection."""
+
+    in_transaction = False
+
+    def __init__(self):
+        self._cnx = self
+        self.cursors = []
+        self.disconnected = False
+        self.returned = False
+
+    def cursor(self, buffered=None, dictionary=None):
+        self.cursors.append(SyncCursor())
+        return self.cursors[-1]
+
+    def disconnect(self):
+        self.disconnected = True
+
+    def close(self):
+        self.returned = True
+
+
+class SyncDriverPool:
+    def __init__(self):
+        self.raw = SyncRaw()
+
+    def get_connection(self):
+        return self.raw
+
+
+class AsyncCursor:
+    def __init__(self):
+        self.rows = list(ROWS)
+        self.drained = False
+
+    async def execute(self, sql, args=None):
+        pass
+
+    async def fetchmany(self, n):
+        await asyncio.sleep(0.02)
+        batch, self.rows = self.rows[:n], self.rows[n:]
+        return batch
+
+    async def close(self):
+        # aiomysql's SSCursor reads the rest of the result here
+        self.drained = True
+
+
+class CursorContext:
+    """What aiomysql's Connection.cursor() returns: awaitable, or an async context manager."""
+
+    def __init__(self, cur):
+        self.cur = cur
+
+    def __await__(self):
+        yield from asyncio.sleep(0).__await__()
+        return self.cur
+
+    async def __aenter__(self):
+        return self.cur
+
+    async def __aexit__(self, *exc):
+        await self.cur.close()
+
+
+class AsyncRaw:
+    """An aiomysql connection."""
+
+    def __init__(self):
+        self.cursors = []
+        self.closed = False
+
+    def cursor(self, cls=None):
+        self.cursors.append(AsyncCursor())
+        return CursorContext(self.cursors[-1])
+
+    def get_transaction_status(self):
+        return False
+
+    def close(self):
+        self.closed = True
+
+
+class AsyncDriverPool:
+    def __init__(self):
+        self.raw = AsyncRaw()
+        self.free = []
+
+    async def acquire(self):
+        return self.raw
+
+    def release(self, raw):
+        if not raw.closed:
+            self.free.append(raw)
+
+
+# -------------------------------
+# HELPERS
+# -------------------------------
+@pytest.fixture
+def pool():
+    saved, saved_replicas = db._pool, list(db._replicas)
+    db._replicas.clear()
+    yield
+    db._pool = saved
+    db._replicas[:] = saved_replicas
+
+
+async def _export_then_disconnect():
+    """Run an export until its first chunk is sent, then disconnect. Returns the chunks sent."""
+    sent = []
+    first_chunk = asyncio.Event()
+
+    async def receive():
+        await first_chunk.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            sent.append(message["body"])
+            first_chunk.set()
+
+    response = StreamingResponse(stream_users(["id", "name"], "ndjson", False, batch_size=2))
+    scope = {"type": "http", "asgi": {"spec_version": "2.3"}, "method": "GET", "path": "/users/export"}
+    await response(scope, receive, send)
+    return sent
+
+
+# -------------------------------
+# TESTS
+# -------------------------------
+def test_sync_export_disconnect_returns_connection(pool):
+    db._pool = db.SyncPool()
+    db._pool._pool = driver = SyncDriverPool()
+    in_use = db.pool_stats()["in_use"]
+
+    sent = asyncio.run(_export_then_disconnect())
+
+    assert 0 < len(sent) < len(ROWS) // 2
+    assert db._pool._slots._value == db.POOL_SIZE
+    assert db.pool_stats()["in_use"] == in_use
+    # the unread result is dropped with the connection, not read to the end
+    assert driver.raw.disconnected and driver.raw.returned
+    assert not driver.raw.cursors[0].closed
+
+
+def test_async_export_disconnect_closes_connection(pool):
+    db._pool = db.AsyncPool()
+    db._pool._pool = driver = AsyncDriverPool()
+    in_use = db.pool_stats()["in_use"]
+
+    sent = asyncio.run(_export_then_disconnect())
+
+    assert 0 < len(sent) < len(ROWS) // 2
+    assert db.pool_stats()["in_use"] == in_use
+    # never back on the free list with an unfinished unbuffered result
+    assert driver.raw.closed and not driver.free
+    assert not driver.raw.cursors[0].drained
+
+
+def test_finished_export_keeps_connection(pool):
+    db._pool = db.AsyncPool()
+    db._pool._pool = driver = AsyncDriverPool()
+
+    async def export():
+        return [chunk async for chunk in stream_users(["id", "name"], "ndjson", False, batch_size=3)]
+
+    body = b"".join(asyncio.run(export()))
+
+    assert body.count(b"\n") == len(ROWS)
+    assert driver.free == [driver.raw] and not driver.raw.closed
+    assert driver.raw.cursors[0].drained
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import signal
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from backend import hashing
+
+
+def _die():
+    # what an OOM kill does to a hashing process
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    monkeypatch.setattr(hashing, "HASH_WORKERS", 1)
+    yield
+    hashing.shutdown_executor()
+
+
+def test_broken_process_pool_is_replaced(executor):
+    restarts = hashing.hash_stats()["pool_restarts"]
+
+    async def run():
+        hashing.start_executor()
+        broken = hashing._executor
+
+        # the retry dies too: the job gives up with a 503
+        with pytest.raises(HTTPException) as e:
+            await hashing._in_process(hashing.start_executor, _die)
+        assert e.value.status_code == 503
+        assert hashing._executor is not broken
+
+        hashed = hashing.pwd_context.hash("pw")
+        return await hashing._in_process(hashing.start_executor, hashing._verify, "pw", hashed)
+
+    assert asyncio.run(run()) is True
+    assert hashing.hash_stats()["pool_restarts"] == restarts + 2
+
+
+def test_bulk_hashing_keeps_to_its_slots(monkeypatch):
+    monkeypatch.setattr(hashing, "HASH_WORKERS", 0)
+    monkeypatch.setattr(hashing, "BULK_HASH_SLOTS", 2)
+    lock = threading.Lock()
+    running, peak = 0, 0
+
+    def slow_hash(password):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return password.upper()
+
+    monkeypatch.setattr(hashing, "_hash", slow_hash)
+
+    async def run():
+        # two bulk requests at once share the two slots
+        return await asyncio.gather(
+            hashing.get_password_hashes([f"a{i}" for i in range(10)]),
+            hashing.get_password_hashes([f"b{i}" for i in range(10)]),
+        )
+
+    try:
+        first, second = asyncio.run(run())
+    finally:
+        hashing.shutdown_executor()
+
+    assert first == [f"A{i}" for i in range(10)] and second == [f"B{i}" for i in range(10)]
+    assert peak == 2
+    assert hashing.hash_stats()["queue_depth"] == 0
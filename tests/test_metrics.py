@@ -0,0 +1,84 @@
+import re
+
+from backend.metrics import Histogram, request_seconds
+
+
+def _samples(text: str, name: str) -> dict:
+    """{labels: value} for every sample of name in an exposition."""
+    pattern = re.compile(rf"^{name}\{{(.*)\}} (\S+)$", re.M)
+    return {labels: float(value) for labels, value in pattern.findall(text)}
+
+
+def _count(labels: tuple) -> int:
+    series = request_seconds._series.get(labels)
+    return series[2] if series else 0
+
+
+# -------------------------------
+# HISTOGRAM
+# -------------------------------
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("test_seconds", "Test", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        h.observe(("/a",), value)
+
+    lines = h.render()
+
+    assert lines[:2] == ["# HELP test_seconds Test", "# TYPE test_seconds histogram"]
+    assert lines[2:] == [
+        'test_seconds_bucket{route="/a",le="0.1"} 2',     # le is inclusive
+        'test_seconds_bucket{route="/a",le="1.0"} 3',
+        'test_seconds_bucket{route="/a",le="+Inf"} 4',
+        'test_seconds_sum{route="/a"} 3.65',
+        'test_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_histogram_series_per_label_set():
+    h = Histogram("test_seconds", "Test", ("method", "route"), buckets=(1.0,))
+    h.observe(("GET", "/a"), 0.5)
+    h.observe(("POST", "/a"), 0.5)
+    h.observe(("GET", "/a"), 0.5)
+
+    counts = _samples("\n".join(h.render()), "test_seconds_count")
+
+    assert counts == {'method="GET",route="/a"': 2, 'method="POST",route="/a"': 1}
+
+
+# -------------------------------
+# MIDDLEWARE AND /metrics
+# -------------------------------
+def test_requests_labelled_by_route_template(client, login):
+    headers = login(0)
+    before = _count(("GET", "/users/{id}", "200"))
+
+    client.get("/users/2", headers=headers)
+    client.get("/users/3", headers=headers)
+
+    assert _count(("GET", "/users/{id}", "200")) == before + 2
+    assert ("GET", "/users/2", "200") not in request_seconds._series
+
+
+def test_unknown_paths_share_one_label(client):
+    before = _count(("GET", "unmatched", "404"))
+
+    client.get("/no/such/path")
+    client.get("/another/one")
+
+    assert _count(("GET", "unmatched", "404")) == before + 2
+
+
+def test_metrics_exposition(client, login):
+    client.get("/users/2", headers=login(0))
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    buckets = _samples(text, "backend_request_seconds_bucket")
+    series = 'method="GET",route="/users/{id}",status="200"'
+    assert buckets[f'{series},le="+Inf"'] == _samples(text, "backend_request_seconds_count")[series]
+    assert "# TYPE backend_phase_seconds histogram" in text
+    assert re.search(r'^backend_cache_hits\{cache="user"\} \d+$', text, re.M)
+    assert re.search(r"^backend_db_pool_size \d+$", text, re.M)
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from backend import ratelimit
+from conftest import PASSWORD
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class BrokenBackend:
+    async def take(self, key, capacity, refill_per_second):
+        raise ConnectionError("redis is down")
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Rate limits on (conftest turns them off), with empty buckets and small capacities."""
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(ratelimit.login_per_ip, "capacity", 3)
+    monkeypatch.setattr(ratelimit.login_per_user, "capacity", 2)
+    monkeypatch.setattr(ratelimit.register_per_ip, "capacity", 2)
+    ratelimit.set_backend(ratelimit.MemoryBackend())
+    yield
+    ratelimit.set_backend(None)
+
+
+def _login(client, n, password=PASSWORD):
+    return client.post("/login", data={"username": f"user{n}@example.com", "password": password})
+
+
+def _register(client, n):
+    return client.post("/register", json={"name": f"new{n}", "email": f"new{n}@example.com", "password": "pw"})
+
+
+def _assert_limited(response):
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+# -------------------------------
+# BACKEND
+# -------------------------------
+def test_memory_backend_refills(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit, "time", clock)
+    backend = ratelimit.MemoryBackend()
+
+    async def take():
+        return await backend.take("k", 2, 0.5)
+
+    assert [asyncio.run(take()) for _ in range(2)] == [0.0, 0.0]
+    assert asyncio.run(take()) == pytest.approx(2.0)
+
+    # one token back after 2 s, never more than the capacity
+    clock.now += 2
+    assert asyncio.run(take()) == 0.0
+    assert asyncio.run(take()) > 0
+    clock.now += 60
+    assert [asyncio.run(take()) > 0 for _ in range(3)] == [False, False, True]
+
+
+def test_memory_backend_drops_least_recently_used():
+    backend = ratelimit.MemoryBackend(max_keys=2)
+
+    async def run():
+        for key in ("a", "b", "a", "c"):
+            await backend.take(key, 1, 1.0)
+
+    asyncio.run(run())
+
+    assert list(backend._buckets) == ["a", "c"]
+
+
+# -------------------------------
+# ROUTES
+# -------------------------------
+def test_login_limited_per_user(client, limits, monkeypatch):
+    monkeypatch.setattr(ratelimit.login_per_ip, "capacity", 10)
+
+    assert _login(client, 0, "wrong").status_code == 400
+    assert _login(client, 0, "wrong").status_code == 400
+
+    # even the right password: the bucket is empty
+    _assert_limited(_login(client, 0))
+    assert _login(client, 1).status_code == 200
+
+
+def test_login_limited_per_ip(client, limits):
+    for n in range(3):
+        assert _login(client, n).status_code == 200
+
+    _assert_limited(_login(client, 3))
+    assert ratelimit.ratelimit_stats()["login_ip"]["limited"] >= 1
+
+
+def test_register_limited_per_ip(client, limits):
+    assert _register(client, 0).status_code == 201
+    assert _register(client, 1).status_code == 201
+
+    _assert_limited(_register(client, 2))
+
+
+def test_broken_backend_fails_open(client, limits):
+    ratelimit.set_backend(BrokenBackend())
+    errors = ratelimit.login_per_ip.errors
+
+    for _ in range(4):
+        assert _login(client, 0).status_code == 200
+
+    assert ratelimit.login_per_ip.errors == errors + 4
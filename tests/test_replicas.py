@@ -0,0 +1,100 @@
+"""Read routing over two bench.fake_db replicas that share the primary's data."""
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import db, sticky
+from backend.main import app
+from bench.fake_db import FakePool
+
+READS = 6
+
+
+@pytest.fixture
+def fake_db(fake_db):
+    """The conftest pool plus two replicas, and no pins left from other tests."""
+    db._replicas[:] = [db.Replica(f"fake{i}", FakePool(raw=fake_db.raw)) for i in range(2)]
+    sticky.set_backend(sticky.MemoryBackend())
+    yield fake_db
+    db._replicas.clear()
+    sticky.set_backend(None)
+
+
+@pytest.fixture
+def headers(client, login):
+    headers = login(0)
+    client.cookies.clear()     # the login itself pinned the client
+    return headers
+
+
+def reads(client, headers, path="/users", n=READS):
+    """Checkouts per pool (primary first) for n GETs."""
+    pools = [db._pool] + [r.pool for r in db._replicas]
+    before = [p.checkouts for p in pools]
+    for _ in range(n):
+        assert client.get(path, headers=headers).status_code == 200
+    return [p.checkouts - b for p, b in zip(pools, before)]
+
+
+def test_reads_round_robin_over_replicas(client, headers):
+    spread = reads(client, headers)
+
+    assert spread[0] == 0 and all(spread[1:])
+
+
+def test_cookie_pins_reads_to_primary_after_write(client, headers):
+    assert client.patch("/users/2", headers=headers, json={"name": "sticky"}).status_code == 200
+    cookie = client.cookies.get(db.STICKY_COOKIE)
+
+    # any worker the cookie reaches reads the write: a new client with just the cookie
+    other_worker = TestClient(app)     # no lifespan: it shares the running one's pools
+    other_worker.cookies.set(db.STICKY_COOKIE, cookie)
+    sticky.set_backend(sticky.MemoryBackend())     # the cookie alone
+
+    assert cookie is not None
+    assert reads(other_worker, headers, "/users/2") == [READS, 0, 0]
+
+
+def test_authorization_pins_reads_without_cookie(client, headers, login):
+    assert client.patch("/users/2", headers=headers, json={"name": "sticky"}).status_code == 200
+
+    # a Bearer client that never sends the cookie back is pinned by its token
+    no_cookies = TestClient(app)
+
+    assert reads(no_cookies, headers, "/users/2") == [READS, 0, 0]
+    assert reads(no_cookies, login(1), "/users/2")[0] == 0
+
+
+def test_pin_expires(client, headers):
+    assert client.patch("/users/2", headers=headers, json={"name": "sticky"}).status_code == 200
+
+    expired = str(int((time.time() - db.DB_STICKY_SECONDS - 1) * 1000))
+    client.cookies.set(db.STICKY_COOKIE, expired)
+    sticky.set_backend(sticky.MemoryBackend())     # as if the token's pin had expired too
+
+    assert reads(client, headers)[0] == 0
+
+
+def test_failover_to_replica_then_primary(client, headers):
+    first, second = db._replicas
+
+    first.pool.down = True
+    assert reads(client, headers) == [0, 0, READS]
+    assert not first.up
+
+    second.pool.down = True
+    assert reads(client, headers) == [READS, 0, 0]
+
+
+def test_replica_recovers(client, headers):
+    for replica in db._replicas:
+        replica.pool.down = True
+    reads(client, headers)
+
+    for replica in db._replicas:
+        replica.pool.down = False
+        replica.down_until = 0.0      # as if DB_REPLICA_RETRY_SECONDS had passed
+    recovered = reads(client, headers)
+
+    assert recovered[0] == 0 and all(recovered[1:])
@@ -0,0 +1,44 @@
+import pytest
+
+from backend import serve
+
+
+@pytest.fixture
+def env(monkeypatch):
+    # setenv first so that the value _split_db_pool writes is undone too
+    monkeypatch.setenv("DB_POOL_SIZE", "")
+    monkeypatch.delenv("DB_POOL_SIZE")
+    monkeypatch.setattr(serve, "DB_POOL_MIN_PER_WORKER", 4)
+    return monkeypatch
+
+
+def test_db_pool_total_is_shared_out(env):
+    env.setattr(serve, "DB_POOL_TOTAL", 40)
+
+    serve._split_db_pool(4)
+
+    assert serve.os.environ["DB_POOL_SIZE"] == "10"
+
+
+def test_db_pool_never_below_the_minimum(env):
+    env.setattr(serve, "DB_POOL_TOTAL", 10)
+
+    serve._split_db_pool(16)
+
+    assert serve.os.environ["DB_POOL_SIZE"] == "4"
+
+
+def test_db_pool_total_defaults_to_the_minimum_per_worker(env):
+    env.setattr(serve, "DB_POOL_TOTAL", 0)
+
+    serve._split_db_pool(16)
+
+    assert serve.os.environ["DB_POOL_SIZE"] == "4"
+
+
+def test_db_pool_size_set_explicitly_wins(env):
+    env.setenv("DB_POOL_SIZE", "2")
+
+    serve._split_db_pool(16)
+
+    assert serve.os.environ["DB_POOL_SIZE"] == "2"
@@ -0,0 +1,157 @@
+import base64
+
+from conftest import SEEDED
+
+from backend.routes import bulk_routes
+
+
+# -------------------------------
+# ETAGS
+# -------------------------------
+def test_get_returns_etag_and_304(client, login):
+    headers = login(0)
+
+    response = client.get("/users/2", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"1"'
+
+    response = client.get("/users/2", headers={**headers, "If-None-Match": '"1"'})
+    assert response.status_code == 304
+
+
+def test_if_match_current_version_applies(client, login):
+    headers = login(0)
+
+    response = client.patch("/users/2", headers={**headers, "If-Match": '"1"'}, json={"name": "first"})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+    assert response.json()["data"]["version"] == 2
+
+
+def test_if_match_stale_version_is_412(client, login, fake_db):
+    headers = login(0)
+    assert client.patch("/users/2", headers=headers, json={"name": "first"}).status_code == 200
+
+    stale = {**headers, "If-Match": '"1"'}
+    assert client.patch("/users/2", headers=stale, json={"name": "second"}).status_code == 412
+    assert client.delete("/users/2", headers=stale).status_code == 412
+    assert fake_db.raw.execute("SELECT name FROM mock_data WHERE id=2").fetchone()[0] == "first"
+
+
+def test_if_match_on_missing_user_is_404(client, login):
+    headers = {**login(0), "If-Match": '"1"'}
+
+    assert client.patch("/users/999", headers=headers, json={"name": "x"}).status_code == 404
+    assert client.delete("/users/999", headers=headers).status_code == 404
+
+
+def test_weak_etag_never_matches(client, login):
+    headers = {**login(0), "If-Match": 'W/"1"'}
+
+    assert client.patch("/users/2", headers=headers, json={"name": "x"}).status_code == 412
+
+
+# -------------------------------
+# KEYSET PAGINATION
+# -------------------------------
+def test_cursor_round_trip(client, login):
+    headers = login(0)
+    ids, cursor, pages = [], None, 0
+
+    while True:
+        params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/users", headers=headers, params=params).json()
+        ids += [user["id"] for user in body["data"]]
+        cursor = body["next_cursor"]
+        pages += 1
+        if cursor is None:
+            break
+
+    assert ids == list(range(1, SEEDED + 1))
+    assert pages == 3
+
+
+def test_cursor_with_filter_and_fields(client, login):
+    headers = login(0)
+
+    first = client.get("/users", headers=headers, params={"limit": 2, "name_prefix": "user1", "fields": "id"}).json()
+    rest = client.get("/users", headers=headers, params={"cursor": first["next_cursor"], "name_prefix": "user1"}).json()
+
+    names = [f"user{user['id'] - 1}" for user in first["data"]] + [user["name"] for user in rest["data"]]
+    assert first["data"][0].keys() == {"id"}
+    assert names == ["user1"] + [f"user{i}" for i in range(10, 20)]
+    assert rest["next_cursor"] is None
+
+
+def test_invalid_cursor_is_400(client, login):
+    headers = login(0)
+    forged = [b'{"id": Infinity}', b'{"id": 1.5}', b'{"id": -1}', b'{"id": true}', b'{"id": "7"}', b'[1]']
+
+    for cursor in ["not-a-cursor"] + [base64.urlsafe_b64encode(raw).decode() for raw in forged]:
+        response = client.get("/users", headers=headers, params={"cursor": cursor})
+        assert response.status_code == 400, cursor
+
+
+# -------------------------------
+# BULK
+# -------------------------------
+def test_bulk_create_results_per_item(client, login):
+    users = [
+        {"name": "a", "email": "a@example.com", "password": "pw"},
+        {"name": "dup", "email": "user0@example.com", "password": "pw"},
+        {"name": "b", "email": "b@example.com", "password": "pw"},
+        {"name": "a again", "email": "A@example.com", "password": "pw"},
+    ]
+
+    body = client.post("/users/bulk", headers=login(0), json={"users": users}).json()
+
+    assert (body["created"], body["failed"]) == (2, 2)
+    assert [r["status"] for r in body["results"]] == ["created", "error", "created", "error"]
+    assert [r["index"] for r in body["results"]] == [0, 1, 2, 3]
+    assert body["results"][1]["detail"] == "Email already exists"
+    assert body["results"][3]["detail"] == "Duplicate email in request"
+    assert body["results"][2]["id"] == SEEDED + 2
+
+
+def test_bulk_patch_results_per_item(client, login, fake_db):
+    items = [
+        {"id": 2, "name": "renamed"},
+        {"id": 999, "name": "ghost"},
+        {"id": 3},
+        {"id": 4, "email": "user0@example.com"},
+    ]
+
+    body = client.patch("/users/bulk", headers=login(0), json={"users": items}).json()
+
+    assert [r["status"] for r in body["results"]] == ["updated", "error", "error", "error"]
+    assert [r.get("detail") for r in body["results"][1:]] == [
+        "User not found", "No fields provided to update", "Email already exists"
+    ]
+    assert fake_db.raw.execute("SELECT name, version FROM mock_data WHERE id=2").fetchone()[:] == ("renamed", 2)
+
+
+def test_bulk_delete_results_per_item(client, login):
+    body = client.request("DELETE", "/users/bulk", headers=login(0), json={"ids": [2, 999, 2]}).json()
+
+    assert (body["deleted"], body["failed"]) == (1, 2)
+    assert [r.get("detail") for r in body["results"]] == [None, "User not found", "Duplicate id in request"]
+
+
+def test_bulk_password_limit_is_413(client, login, monkeypatch):
+    monkeypatch.setattr(bulk_routes, "MAX_BULK_PASSWORDS", 2)
+    headers = login(0)
+    users = [{"name": f"n{i}", "email": f"n{i}@example.com", "password": "pw"} for i in range(3)]
+    patches = [{"id": 2, "name": "x"}, {"id": 3, "password": "pw"}, {"id": 4, "password": "pw"}]
+
+    assert client.post("/users/bulk", headers=headers, json={"users": users}).status_code == 413
+    assert client.patch("/users/bulk", headers=headers, json={"users": patches}).status_code == 200
+    patches[0]["password"] = "pw"
+    assert client.patch("/users/bulk", headers=headers, json={"users": patches}).status_code == 413
+
+
+def test_empty_field_selection_is_400(client, login):
+    headers = login(0)
+
+    assert client.get("/users", headers=headers, params={"fields": ","}).status_code == 400
+    assert client.get("/users/export", headers=headers, params={"fields": " , "}).status_code == 400